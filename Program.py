@@ -1,3 +1,11 @@
+import os
+import re
+import sys
+
+# The token stream is shared with the interpreter in Program/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Program'))
+from tokenstream import TokenStream
+
 # Token types
 #
 # EOF (end-of-file) token is used to indicate that
@@ -10,6 +18,26 @@ EQ, NEQ = 'EQ', 'NEQ'
 STRING = 'STRING'
 IDENTIFIER, ASSIGN = 'IDENTIFIER', 'ASSIGN'
 
+# Trace levels
+#
+# Each level includes the output of the levels below it:
+# statements prints every evaluated statement and its result,
+# tokens additionally prints every word found and token eaten
+TRACE_OFF, TRACE_STATEMENTS, TRACE_TOKENS = 0, 1, 2
+TRACE_LEVELS = {
+    'off': TRACE_OFF,
+    'statements': TRACE_STATEMENTS,
+    'tokens': TRACE_TOKENS,
+}
+
+# Numeric lines
+#
+# A line made only of these characters holds nothing but numbers and
+# arithmetic, so NumericEvaluator can work it out. Its tokens are
+# numbers, or any other single character apart from whitespace.
+NUMERIC_LINE = re.compile(r'[0-9.+\-*/() \t]*')
+NUMERIC_TOKEN = re.compile(r'[0-9][0-9.]*|\S')
+
 
 class Token(object):
     def __init__(self, type, value):
@@ -35,15 +63,38 @@ class Token(object):
 
 
 class Interpreter(object):
-    def __init__(self, text, global_vars):
+    def __init__(self, text, global_vars, trace=TRACE_OFF):
+        self.global_vars = global_vars if global_vars is not None else {}
+        # Turned off while skipping the right side of a short circuited
+        # and/or, which is parsed but not evaluated
+        self.evaluate = True
+
+        # Tracing swaps in the traced methods once, here, so that the
+        # untraced path does not pay for a level check on every token
+        self.trace = trace
+        # Tokens are buffered so statement() can look ahead for '='
+        self.tokens = TokenStream(self)
+        if trace >= TRACE_STATEMENTS:
+            self.statement = self.traced_statement
+        if trace >= TRACE_TOKENS:
+            self.get_next_token = self.traced_get_next_token
+            self.eat = self.traced_eat
+
+        self.load(text)
+
+    def load(self, text):
+        """Point the interpreter at a new line of input.
+
+        Lets one instance evaluate every line of a file instead of
+        building a new interpreter per line.
+        """
         # client string input, e.g. "3+5"
         self.text = text
         # self.pos is an index into self.text
         self.pos = 0
+        self.tokens.clear()
         # current token instance
-        self.current_token = self.get_next_token()
-
-        self.global_vars = global_vars if global_vars is not None else {}
+        self.current_token = self.tokens.peek()
 
     def error(self):
         raise Exception('Error parsing input')
@@ -128,7 +179,6 @@ class Interpreter(object):
             while self.pos < len(text) and (text[self.pos].isalnum() or text[self.pos] == '_'):
                 self.pos += 1
             word = text[start_pos:self.pos].lower()
-            print(f"Found word token: '{word}'")
             if word == 'true':
                 return Token(TRUE, True)
             elif word == 'false':
@@ -186,13 +236,27 @@ class Interpreter(object):
             return Token(INTEGER, float(result))
 
 
+    def traced_get_next_token(self):
+        start_pos = self.pos
+        token = Interpreter.get_next_token(self)
+        # Words are told apart by their text, since '!' lexes as NOT too
+        word = self.text[start_pos:self.pos].strip().lower()
+        if token is not None and word[:1].isalpha():
+            print(f"Found word token: '{word}'")
+        return token
+
     def eat(self, token_type):
         if self.current_token.type == token_type:
-            print(f"Eating token: {self.current_token}")
-            self.current_token = self.get_next_token()
+            self.tokens.advance()
+            self.current_token = self.tokens.peek()
         else:
             self.error()
 
+    def traced_eat(self, token_type):
+        if self.current_token.type == token_type:
+            print(f"Eating token: {self.current_token}")
+        Interpreter.eat(self, token_type)
+
 
     def factor(self):
         token = self.current_token
@@ -203,7 +267,8 @@ class Interpreter(object):
 
         if token.type == MINUS:
             self.eat(MINUS)
-            return -self.factor()
+            value = self.factor()
+            return -value if self.evaluate else None
 
         if token.type == INTEGER:
             self.eat(INTEGER)
@@ -230,6 +295,8 @@ class Interpreter(object):
         if token.type == IDENTIFIER:
             var_name = token.value
             self.eat(IDENTIFIER)
+            if not self.evaluate:
+                return None
             if var_name in self.global_vars:
                 return self.global_vars[var_name]
             else:
@@ -245,10 +312,14 @@ class Interpreter(object):
             token = self.current_token
             if token.type == MUL:
                 self.eat(MUL)
-                result *= self.factor()
+                right = self.factor()
+                if self.evaluate:
+                    result *= right
             elif token.type == DIV:
                 self.eat(DIV)
                 divisor = self.factor()
+                if not self.evaluate:
+                    continue
                 if divisor == 0:
                     raise Exception('Division by zero')
                 result /= divisor
@@ -263,6 +334,8 @@ class Interpreter(object):
             if token.type == PLUS:
                 self.eat(PLUS)
                 right = self.term()
+                if not self.evaluate:
+                    continue
 
                 if isinstance(result, str) and isinstance(right, str):
                     result = result+right
@@ -273,24 +346,43 @@ class Interpreter(object):
             elif token.type == MINUS:
                 self.eat(MINUS)
                 right= self.term()
+                if not self.evaluate:
+                    continue
                 if isinstance(result, (int, float)) and isinstance(right, (int, float)):
                     result = result - right
                 else:
                     raise Exception(f"Type error: cannot subtract {type(result).__name__} and {type(right).__name__}")
         return result
     
+    def skip(self, parse):
+        # Parses an operand without evaluating it
+        evaluate = self.evaluate
+        self.evaluate = False
+        try:
+            parse()
+        finally:
+            self.evaluate = evaluate
+
     def logical_or(self):
         result = self.logical_and()
         while self.current_token.type == OR:
             self.eat(OR)
-            result = result or self.logical_and()
+            # The right side only runs when the left is false
+            if self.evaluate and not result:
+                result = self.logical_and()
+            else:
+                self.skip(self.logical_and)
         return result
     
     def logical_and(self):
         result = self.equality()
         while self.current_token.type == AND:
             self.eat(AND)
-            result = result and self.equality()
+            # The right side only runs when the left is true
+            if self.evaluate and result:
+                result = self.equality()
+            else:
+                self.skip(self.equality)
         return result
     
     def equality(self):
@@ -309,18 +401,18 @@ class Interpreter(object):
         result = self.expr()
         while self.current_token.type in (LT, GT, LE, GE):
             token = self.current_token
+            self.eat(token.type)
+            right = self.term()
+            if not self.evaluate:
+                continue
             if token.type == LT:
-                self.eat(LT)
-                result = (result < self.term())
+                result = (result < right)
             elif token.type == LE:
-                self.eat(LE)
-                result = (result <= self.term())
+                result = (result <= right)
             elif token.type == GT:
-                self.eat(GT)
-                result = (result > self.term())
+                result = (result > right)
             elif token.type == GE:
-                self.eat(GE)
-                result = (result >= self.term())
+                result = (result >= right)
         return result
     
     def statement(self):
@@ -330,44 +422,168 @@ class Interpreter(object):
             print(expr_val)
             return expr_val
 
-        if self.current_token.type == IDENTIFIER:
+        if self.current_token.type == IDENTIFIER and self.tokens.peek(1).type == ASSIGN:
             var_name = self.current_token.value
-            saved_pos = self.pos
-            saved_token = self.current_token
-
             self.eat(IDENTIFIER)
-            if self.current_token.type == ASSIGN:
-                self.eat(ASSIGN)
-                expr_val = self.logical_or()
-                self.global_vars[var_name] = expr_val
-                return expr_val
-            else:
-                self.pos = saved_pos
-                self.current_token = saved_token
+            self.eat(ASSIGN)
+            expr_val = self.logical_or()
+            self.global_vars[var_name] = expr_val
+            return expr_val
 
         return self.logical_or()
 
+    def traced_statement(self):
+        text = self.text
+        result = Interpreter.statement(self)
+        print(f"Statement: {text} -> {result!r}")
+        return result
+
+
+class SlowPath(Exception):
+    # Raised when a numeric line has to go through the Interpreter
+    pass
+
+
+class NumericEvaluator(object):
+    """Fast path for lines that are only numbers and arithmetic.
+
+    Such lines cannot read or write variables or print, so their value
+    depends on the text alone. The line is split into tokens with one
+    regular expression and evaluated by expr, term and factor, which
+    follow the Interpreter's grammar for numbers: the same precedence,
+    the same left to right order of operations and the same unused
+    trailing tokens. Values are cached by line text, up to limit lines.
+    Anything the Interpreter would reject, such as a parse error or a
+    division by zero, makes value() return None instead, so the caller
+    runs the line through the Interpreter, which raises its usual error.
+    """
+
+    def __init__(self, limit=4096):
+        self.cache = {}
+        self.limit = limit
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    def value(self, line):
+        # Returns the line's value, or None if the Interpreter has to run it
+        value = self.cache.get(line)
+        if value is not None:
+            self.hits += 1
+            return value
+        if not NUMERIC_LINE.fullmatch(line):
+            return None
+        self.tokens = NUMERIC_TOKEN.findall(line)
+        self.tokens.append(None)
+        self.pos = 0
+        try:
+            value = self.expr()
+            self.check_lookahead()
+        except Exception:
+            self.fallbacks += 1
+            return None
+        self.misses += 1
+        if self.limit:
+            if len(self.cache) >= self.limit:
+                # Forget the oldest line
+                del self.cache[next(iter(self.cache))]
+            self.cache[line] = value
+        return value
+
+    def check_lookahead(self):
+        # The Interpreter lexes one token past the end of the expression,
+        # and fails there on a lone '.' or a number with two
+        token = self.tokens[self.pos]
+        if token is not None and (token == '.' or token.count('.') > 1):
+            raise SlowPath()
+
+    def factor(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        if token == '-':
+            return -self.factor()
+        if token == '(':
+            result = self.expr()
+            if self.tokens[self.pos] != ')':
+                raise SlowPath()
+            self.pos += 1
+            return result
+        if token is not None and token[0].isdigit():
+            dot_count = token.count('.')
+            if dot_count == 0:
+                return int(token)
+            if dot_count == 1:
+                return float(token)
+        raise SlowPath()
+
+    def term(self):
+        result = self.factor()
+        while True:
+            token = self.tokens[self.pos]
+            if token == '*':
+                self.pos += 1
+                result *= self.factor()
+            elif token == '/':
+                self.pos += 1
+                divisor = self.factor()
+                if divisor == 0:
+                    raise SlowPath()
+                result /= divisor
+            else:
+                return result
+
+    def expr(self):
+        result = self.term()
+        while True:
+            token = self.tokens[self.pos]
+            if token == '+':
+                self.pos += 1
+                result += self.term()
+            elif token == '-':
+                self.pos += 1
+                result -= self.term()
+            else:
+                return result
+
 
 def main():
-    import sys
     global_vars = {}
 
-    if len(sys.argv) == 2:
-        file_path = sys.argv[1]
+    args = sys.argv[1:]
+    trace = TRACE_OFF
+    if args and args[0].startswith('--trace='):
+        level = args.pop(0)[len('--trace='):]
+        if level not in TRACE_LEVELS:
+            print(f"Unknown trace level: {level} (expected one of {', '.join(TRACE_LEVELS)})")
+            return
+        trace = TRACE_LEVELS[level]
+    # Numeric lines skip the Interpreter, unless tracing shows its steps
+    numeric = NumericEvaluator() if trace == TRACE_OFF else None
+
+    if len(args) == 1:
+        file_path = args[0]
         try:
             with open(file_path, 'r') as f:
+                # One interpreter is reused for every line of the file
+                interpreter = None
                 for line in f:
                     line = line.strip()
                     if not line:
                         continue
-                    interpreter = Interpreter(line, global_vars)
-                    result = interpreter.statement()
+                    result = numeric.value(line) if numeric else None
+                    if result is None:
+                        if interpreter is None:
+                            interpreter = Interpreter(line, global_vars, trace)
+                        else:
+                            interpreter.load(line)
+                        result = interpreter.statement()
                     print(result)
         except FileNotFoundError:
             print(f"File not found: {file_path}")
 
     else:
-
+        interpreter = None
         while True:
             try:
                 # To run under Python3 replace 'raw_input' call
@@ -377,8 +593,13 @@ def main():
                 break
             if not text:
                 continue
-            interpreter = Interpreter(text, global_vars)
-            result = interpreter.statement()
+            result = numeric.value(text) if numeric else None
+            if result is None:
+                if interpreter is None:
+                    interpreter = Interpreter(text, global_vars, trace)
+                else:
+                    interpreter.load(text)
+                result = interpreter.statement()
             print(result)
 
 
@@ -1,12 +1,20 @@
 class AST:
     # Base class
-    pass
+    # Type of the node's value when known before running, set by typecheck
+    static_type = None
+    # Names of the attributes holding child nodes
+    _fields = ()
+    # Source position the node starts at, set by the parser
+    line = None
+    column = None
 
 class Block(AST):
     def __init__(self, statements):
         # Block = multiple statements
         self.statements = statements
 
+    _fields = ('statements',)
+
 class BinOp(AST):
     def __init__(self, left, op, right):
         #  Represents binary, op = operator token
@@ -14,12 +22,35 @@ class BinOp(AST):
         self.op = op
         self.right = right
 
+    _fields = ('left', 'right')
+
+    # Operator function for statically typed operands, set by typecheck
+    impl = None
+
+class And(AST):
+    def __init__(self, left, right):
+        # Represents logical and, right is only evaluated when left is true
+        self.left = left
+        self.right = right
+
+    _fields = ('left', 'right')
+
+class Or(AST):
+    def __init__(self, left, right):
+        # Represents logical or, right is only evaluated when left is false
+        self.left = left
+        self.right = right
+
+    _fields = ('left', 'right')
+
 class UnaryOp(AST):
     def __init__(self, op, expr):
         # Represents unary operation
         self.op = op
         self.expr = expr
 
+    _fields = ('expr',)
+
 class Num(AST):
     def __init__(self, value):
         # Represents numeric value
@@ -46,21 +77,31 @@ class Assign(AST):
         self.name = name
         self.expr = expr
 
+    _fields = ('expr',)
+    # Memo slots that depend on this variable, set by cse
+    kills = ()
+
 class Delete(AST):
     def __init__(self, name):
         # Represents delete statement, removing varialbe 
         self.name = name
 
+    kills = ()
+
 class Print(AST):
     def __init__(self, expr):
         # Represents print statement
         self.expr = expr
 
+    _fields = ('expr',)
+
 class Input(AST):
     def __init__(self, var_name=None):
         # Represents input statement
         self.var_name = var_name
 
+    kills = ()
+
 class If(AST):
     def __init__(self, cond, then_expr, else_expr):
         # Represents if statement with branches, condition, then if true, else if false
@@ -68,8 +109,81 @@ class If(AST):
         self.then_expr = then_expr
         self.else_expr = else_expr
 
+    _fields = ('cond', 'then_expr', 'else_expr')
+
 class While(AST):
     def __init__(self, cond, body):
         # Represents a while loop
         self.cond = cond
         self.body = body
+
+    _fields = ('cond', 'body')
+
+class Memo(AST):
+    def __init__(self, expr, slot):
+        # Represents a shared pure subexpression, computed once into a
+        # hidden temporary until a variable it reads changes
+        self.expr = expr
+        self.slot = slot
+        self.static_type = expr.static_type
+        copy_location(self, expr)
+
+    _fields = ('expr',)
+
+class Increment(AST):
+    def __init__(self, name, op, amount):
+        # Fused name = name + constant or name - constant, op is the
+        # Python operator function
+        self.name = name
+        self.op = op
+        self.amount = amount
+
+    kills = ()
+
+class Accumulate(AST):
+    def __init__(self, name, op, expr):
+        # Fused name = name <op> expr, for an arithmetic operator
+        self.name = name
+        self.op = op
+        self.expr = expr
+
+    _fields = ('expr',)
+    kills = ()
+
+class CompareVars(AST):
+    def __init__(self, op, left, right):
+        # Fused comparison of two variables by name
+        self.op = op
+        self.left = left
+        self.right = right
+
+class CompareConst(AST):
+    def __init__(self, op, name, value):
+        # Fused comparison of a variable with a numeric constant
+        self.op = op
+        self.name = name
+        self.value = value
+
+def copy_location(new, old):
+    # Gives a node made by a pass the source position of the one it replaces
+    new.line = old.line
+    new.column = old.column
+    return new
+
+def iter_child_nodes(node):
+    # Yields the direct children of a node
+    for field in node._fields:
+        value = getattr(node, field)
+        if isinstance(value, list):
+            yield from value
+        elif value is not None:
+            yield value
+
+def walk(node):
+    # Yields a node and everything below it
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(iter_child_nodes(node))
+
@@ -0,0 +1,151 @@
+# checkpoint.py
+import hashlib
+import marshal
+import os
+import time
+from interpreter import Interpreter
+from ast_nodes import *
+
+# Bumped when the layout of a checkpoint changes
+VERSION = 1
+
+
+def statement_paths(tree):
+    """Map every statement of a program to its path from the root.
+
+    A path is a tuple of ints, one per Block, If or While on the way
+    down: the index of the statement in a Block, 0 for the then branch
+    and 1 for the else branch of an If, and 0 for the body of a While.
+    The tree does not change while it runs, so a statement's path says
+    exactly where in the program it is, loops included.
+    """
+    paths = {}
+    pending = [(tree, ())]
+    while pending:
+        node, path = pending.pop()
+        if isinstance(node, Block):
+            children = [(child, path + (index,)) for index, child in enumerate(node.statements)]
+        elif isinstance(node, If):
+            children = [(node.then_expr, path + (0,))]
+            if node.else_expr is not None:
+                children.append((node.else_expr, path + (1,)))
+        elif isinstance(node, While):
+            children = [(node.body, path + (0,))]
+        else:
+            continue
+        for child, child_path in children:
+            if not isinstance(child, Block):
+                paths[id(child)] = child_path
+            pending.append((child, child_path))
+    return paths
+
+
+def source_key(text, optimise=False):
+    # Identifies the program a checkpoint belongs to; optimising changes the tree
+    return hashlib.sha1(text.encode()).hexdigest() + ('-O' if optimise else '')
+
+
+class Checkpointer:
+    """Periodically saves a running program's state, and resumes from it.
+
+    A checkpoint is the marshalled tuple (version, source key, path,
+    variables), taken just before a statement runs: path is the
+    statement's path from statement_paths and variables a copy of
+    global_vars. Loops keep all their state in variables, since a While
+    checks its condition again each time round, so nothing else is
+    needed to continue. Checkpoints are written to a temporary file that
+    is synced to disk and then replaces the old one, so a crash never
+    leaves a half written checkpoint. The file is removed once the
+    program finishes.
+
+    Like the debugger, it only instruments the interpreter instance it
+    is given, through an instance attribute shadowing Interpreter.visit.
+    """
+
+    def __init__(self, interpreter, path, key, steps=10000, seconds=60.0, resume=False):
+        self.interpreter = interpreter
+        self.path = path
+        self.key = key
+        # Checkpoint every steps statements or seconds, whichever comes first
+        self.steps = steps
+        self.seconds = seconds
+        self.resuming = resume
+        self.paths = {}
+        self.countdown = steps
+        self.deadline = None
+        self.written = 0
+
+    def run(self, tree):
+        # Runs a program, from its last checkpoint when resuming and there is one
+        self.paths = statement_paths(tree)
+        position = self.load() if self.resuming else None
+        self.countdown = self.steps
+        self.deadline = time.monotonic() + self.seconds
+        self.interpreter.visit = self.visit
+        try:
+            if position is None:
+                result = self.interpreter.visit(tree)
+            else:
+                result = self.resume(tree, position)
+        finally:
+            del self.interpreter.visit
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        return result
+
+    def visit(self, node):
+        path = self.paths.get(id(node))
+        if path is not None:
+            self.countdown -= 1
+            if self.countdown <= 0 or time.monotonic() >= self.deadline:
+                self.save(path)
+        return Interpreter.visit(self.interpreter, node)
+
+    def save(self, path):
+        data = marshal.dumps((VERSION, self.key, path, dict(self.interpreter.global_vars)))
+        temporary = self.path + '.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(data)
+            # On disk before the rename, or a machine crash can leave the
+            # renamed checkpoint empty
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.path)
+        self.written += 1
+        self.countdown = self.steps
+        self.deadline = time.monotonic() + self.seconds
+
+    def load(self):
+        # Restores the variables of the checkpoint and returns its path,
+        # or None when there is no checkpoint to resume
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, 'rb') as f:
+            try:
+                version, key, path, variables = marshal.load(f)
+            except (EOFError, ValueError, TypeError):
+                raise Exception(f"Checkpoint '{self.path}' is damaged") from None
+        if version != VERSION:
+            raise Exception(f"Checkpoint '{self.path}' is from another version")
+        if key != self.key:
+            raise Exception(f"Checkpoint '{self.path}' is for a different program")
+        global_vars = self.interpreter.global_vars
+        global_vars.clear()
+        global_vars.update(variables)
+        return path
+
+    def resume(self, node, path):
+        # Runs node from the statement at path, skipping everything before it
+        if not path:
+            return self.interpreter.visit(node)
+        index, rest = path[0], path[1:]
+        if isinstance(node, Block):
+            result = self.resume(node.statements[index], rest)
+            for stmt in node.statements[index + 1:]:
+                result = self.interpreter.visit(stmt)
+            return result
+        if isinstance(node, If):
+            return self.resume(node.else_expr if index else node.then_expr, rest)
+        # A While: finish this time round the body, then keep looping
+        self.resume(node.body, rest)
+        return self.interpreter.visit(node)
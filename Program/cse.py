@@ -0,0 +1,139 @@
+# cse.py
+import itertools
+from collections import Counter
+from ast_nodes import *
+
+# Memo slots are unique across every program optimised in this process,
+# so temporaries of different programs never share a slot
+SLOTS = itertools.count()
+
+
+class CommonSubexpressionEliminator:
+    """Shares identical pure subexpressions through hidden temporaries.
+
+    Expressions are pure unless they contain input, so two subtrees with
+    the same structure always have the same value while the variables
+    they read are unchanged. An operator expression that appears twice in one
+    statement, or in two adjacent statements of a block, is wrapped in a
+    Memo node. Every copy shares one slot, so the first one evaluated
+    fills the temporary and the others reuse it. Each Assign, Delete and
+    Input gets the slots that read its variable in kills, and the
+    interpreter drops those temporaries when the variable changes.
+    """
+
+    def __init__(self):
+        # id(node) -> structural key, None for impure expressions
+        self.keys = {}
+        # Structural key -> names of the variables the expression reads
+        self.reads = {}
+        # Structural key -> memo slot, for the expressions being shared
+        self.slots = {}
+
+    def key(self, node):
+        # Returns a hashable key equal for structurally identical pure
+        # expressions, or None if the expression is not pure
+        if id(node) in self.keys:
+            return self.keys[id(node)]
+        key = None
+        reads = frozenset()
+        if isinstance(node, Num):
+            # The type is part of the key so 1 and 1.0 stay apart
+            key = ('Num', type(node.value), node.value)
+        elif isinstance(node, Bool):
+            key = ('Bool', node.value)
+        elif isinstance(node, Str):
+            key = ('Str', node.value)
+        elif isinstance(node, Var):
+            key = ('Var', node.name)
+            reads = frozenset((node.name,))
+        elif isinstance(node, Memo):
+            key = self.key(node.expr)
+            reads = self.reads.get(key, reads)
+        elif isinstance(node, BinOp):
+            left, right = self.key(node.left), self.key(node.right)
+            if left is not None and right is not None:
+                key = ('BinOp', node.op.type, left, right)
+                reads = self.reads[left] | self.reads[right]
+        elif isinstance(node, (And, Or)):
+            left, right = self.key(node.left), self.key(node.right)
+            if left is not None and right is not None:
+                key = (type(node).__name__, left, right)
+                reads = self.reads[left] | self.reads[right]
+        elif isinstance(node, UnaryOp):
+            expr = self.key(node.expr)
+            if expr is not None:
+                key = ('UnaryOp', node.op.type, expr)
+                reads = self.reads[expr]
+        self.keys[id(node)] = key
+        if key is not None:
+            self.reads[key] = reads
+        return key
+
+    def count(self, node):
+        # Counts the shareable expressions below a statement
+        counts = Counter()
+        for child in walk(node):
+            if isinstance(child, (BinOp, And, Or, UnaryOp)):
+                key = self.key(child)
+                if key is not None:
+                    counts[key] += 1
+        return counts
+
+    def find_shared(self, tree):
+        # Picks the expressions repeated within a statement or across
+        # two adjacent statements of the same block
+        for block in walk(tree):
+            if not isinstance(block, Block):
+                continue
+            previous = Counter()
+            for stmt in block.statements:
+                counts = self.count(stmt)
+                for key, times in counts.items():
+                    if times > 1 or key in previous:
+                        self.slots.setdefault(key, next(SLOTS))
+                previous = counts
+
+    def rewrite(self, node):
+        # Wraps the shared expressions below node in Memo nodes
+        for field in node._fields:
+            value = getattr(node, field)
+            if isinstance(value, list):
+                setattr(node, field, [self.replace(child) for child in value])
+            elif value is not None:
+                setattr(node, field, self.replace(value))
+        return node
+
+    def replace(self, node):
+        # Returns the node, wrapped in a Memo if it is shared
+        self.rewrite(node)
+        if isinstance(node, (BinOp, And, Or, UnaryOp)):
+            key = self.keys.get(id(node))
+            if key in self.slots:
+                return Memo(node, self.slots[key])
+        return node
+
+    def optimize(self, tree, report=None):
+        self.find_shared(tree)
+        if not self.slots:
+            return tree
+        self.rewrite(tree)
+
+        # Every write to a variable invalidates the temporaries reading it
+        readers = {}
+        for key, slot in self.slots.items():
+            for name in self.reads[key]:
+                readers.setdefault(name, []).append(slot)
+        for node in walk(tree):
+            if isinstance(node, (Assign, Delete)) and node.name in readers:
+                node.kills = tuple(readers[node.name])
+            elif isinstance(node, Input) and node.var_name in readers:
+                node.kills = tuple(readers[node.var_name])
+
+        if report is not None:
+            report.append(f"cse: shared {len(self.slots)} repeated subexpression(s)")
+        return tree
+
+
+def eliminate_common_subexpressions(tree, report=None):
+    # Shares repeated pure subexpressions of a parsed program
+    return CommonSubexpressionEliminator().optimize(tree, report)
@@ -0,0 +1,128 @@
+# deadcode.py
+from interpreter import Interpreter
+from ast_nodes import *
+
+
+class DeadCodeEliminator:
+    """Removes code that can never run or whose result is never used.
+
+    An if whose condition is a constant is replaced by the branch it
+    always takes, and a while whose condition is a constant false value
+    is dropped. An assignment is a dead store when the same block writes
+    or deletes the variable again before anything reads it; it is
+    dropped when its value is a constant, so removing it cannot hide an
+    error of its own. It can change global_vars at the point of a later
+    error, though: when the overwriting statement fails, the variable
+    keeps its older value (or stays unset) instead of the dropped
+    constant. In 'c = (true < true)' then 'c = b' with b undefined, the
+    error is the same but c is not False afterwards.
+    """
+
+    def __init__(self):
+        self.inlined_ifs = 0
+        self.removed_loops = 0
+        self.dead_stores = []
+
+    def constant(self, node):
+        # Returns (True, value) if node always evaluates to the same value
+        # without an error, otherwise (False, None)
+        if isinstance(node, (Num, Bool, Str)):
+            return True, node.value
+        if isinstance(node, Memo):
+            return self.constant(node.expr)
+        if isinstance(node, (And, Or)):
+            # A constant left side can decide the value on its own
+            is_constant, value = self.constant(node.left)
+            if is_constant and bool(value) == isinstance(node, Or):
+                return True, value
+        if isinstance(node, (BinOp, And, Or, UnaryOp)):
+            if all(self.constant(child)[0] for child in iter_child_nodes(node)):
+                try:
+                    return True, Interpreter().visit(node)
+                except Exception:
+                    pass
+        return False, None
+
+    def statement(self, node):
+        # Returns the list of statements that replace node
+        if isinstance(node, If):
+            is_constant, value = self.constant(node.cond)
+            if is_constant:
+                self.inlined_ifs += 1
+                taken = node.then_expr if value else node.else_expr
+                return self.statement(taken) if taken is not None else []
+            node.then_expr = self.nested(node.then_expr)
+            node.else_expr = self.nested(node.else_expr)
+            return [node]
+
+        if isinstance(node, While):
+            is_constant, value = self.constant(node.cond)
+            if is_constant and not value:
+                self.removed_loops += 1
+                return []
+            node.body = self.nested(node.body)
+            return [node]
+
+        if isinstance(node, Block):
+            # A block inside a block runs the same once its statements
+            # are spliced into the outer one
+            return self.block(node.statements)
+
+        return [node]
+
+    def nested(self, node):
+        # Optimises the body of an if or while, keeping it a single node
+        if node is None:
+            return None
+        statements = self.statement(node)
+        if len(statements) == 1:
+            return statements[0]
+        return Block(statements)
+
+    def block(self, statements):
+        # Optimises a list of statements
+        result = []
+        for stmt in statements:
+            replacement = self.statement(stmt)
+            result.extend(replacement)
+        # A block's value is its last statement's, so a removed last
+        # statement leaves an empty block behind to keep the value None
+        if statements and not replacement:
+            result.append(Block([]))
+        return self.remove_dead_stores(result)
+
+    def remove_dead_stores(self, statements):
+        # Walks the block backwards, tracking the variables that are
+        # written again before being read
+        overwritten = set()
+        kept = []
+        for stmt in reversed(statements):
+            if (isinstance(stmt, Assign) and stmt.name in overwritten
+                    and self.constant(stmt.expr)[0]):
+                self.dead_stores.append(stmt.name)
+                continue
+            if isinstance(stmt, (Assign, Delete)):
+                overwritten.add(stmt.name)
+            elif isinstance(stmt, Input):
+                overwritten.add(stmt.var_name)
+            overwritten -= {node.name for node in walk(stmt) if isinstance(node, Var)}
+            kept.append(stmt)
+        kept.reverse()
+        return kept
+
+    def optimize(self, tree, report=None):
+        tree = Block(self.block(tree.statements))
+        if report is not None:
+            if self.inlined_ifs:
+                report.append(f"deadcode: inlined {self.inlined_ifs} if statement(s) with a constant condition")
+            if self.removed_loops:
+                report.append(f"deadcode: removed {self.removed_loops} while loop(s) with a false condition")
+            if self.dead_stores:
+                names = ', '.join(reversed(self.dead_stores))
+                report.append(f"deadcode: removed {len(self.dead_stores)} dead store(s) to {names}")
+        return tree
+
+
+def eliminate_dead_code(tree, report=None):
+    # Removes unreachable branches and dead stores from a parsed program
+    return DeadCodeEliminator().optimize(tree, report)
@@ -0,0 +1,124 @@
+# debugger.py
+import sys
+from interpreter import Interpreter
+from stats import statement_ids
+
+HELP = """commands:
+  b LINE   stop before statements on LINE
+  w NAME   stop after statements that change NAME
+  d LINE   delete a breakpoint, or d NAME a watchpoint
+  s        run one statement and stop
+  c        continue to the next breakpoint or watched change
+  p [NAME] print a variable, or all of them
+  q        quit the program"""
+
+# Stands in for a watched variable that is not set
+UNSET = object()
+
+
+class Debugger:
+    """Line breakpoints, variable watchpoints and stepping for a script.
+
+    The Interpreter has no debugging checks of its own. While a
+    breakpoint or watchpoint is set, or a step is pending, the debugger
+    puts its own visit on the interpreter instance, which shadows
+    Interpreter.visit for every call the interpreter makes. As soon as
+    none are left it deletes that attribute again, so a run without them
+    goes through exactly the code it would without a debugger.
+    """
+
+    def __init__(self, interpreter, text, filename='<script>'):
+        self.interpreter = interpreter
+        self.lines = text.split('\n')
+        self.filename = filename
+        self.breakpoints = set()
+        # Watched names and the values last seen for them
+        self.watches = {}
+        self.stepping = False
+        self.statements = set()
+
+    def run(self, tree):
+        # Runs a program, stopping before its first statement
+        self.statements = statement_ids(tree)
+        self.stepping = True
+        self.update()
+        try:
+            return self.interpreter.visit(tree)
+        finally:
+            self.detach()
+
+    def update(self):
+        # Instruments the interpreter only while there is something to stop for
+        if self.breakpoints or self.watches or self.stepping:
+            self.interpreter.visit = self.visit
+        else:
+            self.detach()
+
+    def detach(self):
+        if 'visit' in vars(self.interpreter):
+            del self.interpreter.visit
+
+    def visit(self, node):
+        if id(node) not in self.statements:
+            return Interpreter.visit(self.interpreter, node)
+        if self.stepping or node.line in self.breakpoints:
+            self.pause(node)
+        result = Interpreter.visit(self.interpreter, node)
+        if self.watches:
+            self.check_watches(node)
+        return result
+
+    def check_watches(self, node):
+        # Stops if a statement changed a watched variable. Values are
+        # compared with the last ones seen, so a statement in a loop body
+        # reports a change once, not again for the loop around it.
+        global_vars = self.interpreter.global_vars
+        for name, old in list(self.watches.items()):
+            new = global_vars.get(name, UNSET)
+            if new is not old and new != old:
+                self.watches[name] = new
+                print(f"{name}: {self.describe(old)} -> {self.describe(new)}", file=sys.stderr)
+                self.pause(node, 'after')
+
+    def describe(self, value):
+        return '<unset>' if value is UNSET else repr(value)
+
+    def pause(self, node, where='before'):
+        # Shows where the program stopped and reads commands until it resumes
+        self.stepping = False
+        line = node.line
+        if line is not None and line <= len(self.lines):
+            print(f"{where} {self.filename}:{line}: {self.lines[line - 1].strip()}", file=sys.stderr)
+        while True:
+            try:
+                command = input('debug> ').split()
+            except EOFError:
+                command = ['q']
+            if not command:
+                continue
+            name, args = command[0], command[1:]
+            if name == 'b' and len(args) == 1 and args[0].isdigit():
+                self.breakpoints.add(int(args[0]))
+            elif name == 'w' and len(args) == 1:
+                word = args[0].lower()
+                self.watches[word] = self.interpreter.global_vars.get(word, UNSET)
+            elif name == 'd' and len(args) == 1:
+                if args[0].isdigit():
+                    self.breakpoints.discard(int(args[0]))
+                else:
+                    self.watches.pop(args[0].lower(), None)
+            elif name == 's':
+                self.stepping = True
+                break
+            elif name == 'c':
+                break
+            elif name == 'p':
+                global_vars = self.interpreter.global_vars
+                names = [args[0].lower()] if args else sorted(global_vars)
+                for word in names:
+                    print(f"{word} = {self.describe(global_vars.get(word, UNSET))}", file=sys.stderr)
+            elif name == 'q':
+                sys.exit(0)
+            else:
+                print(HELP, file=sys.stderr)
+        self.update()
@@ -0,0 +1,129 @@
+# environment.py
+from parser import Parser
+from interpreter import Interpreter
+from typecheck import check
+
+
+class Environment(dict):
+    """Variables layered copy-on-write over a frozen parent mapping.
+
+    Creating one is O(1): it starts empty and reads fall through to the
+    parent through __missing__. Writes go to the environment itself and
+    never touch the parent, and deleting a parent variable only hides it.
+    Looking a variable up with [] runs at plain dict speed once it has
+    been written in this environment.
+    """
+
+    def __init__(self, parent):
+        super().__init__()
+        self.parent = parent
+        # Parent variables deleted in this environment
+        self.deleted = set()
+
+    def __missing__(self, name):
+        if name in self.deleted:
+            raise KeyError(name)
+        return self.parent[name]
+
+    def __contains__(self, name):
+        if dict.__contains__(self, name):
+            return True
+        return name not in self.deleted and name in self.parent
+
+    def __delitem__(self, name):
+        found = dict.__contains__(self, name)
+        if found:
+            dict.__delitem__(self, name)
+        if name not in self.deleted and name in self.parent:
+            self.deleted.add(name)
+            found = True
+        if not found:
+            raise KeyError(name)
+
+    def __iter__(self):
+        yield from dict.__iter__(self)
+        for name in self.parent:
+            if name not in self.deleted and not dict.__contains__(self, name):
+                yield name
+
+    def __len__(self):
+        return sum(1 for name in self)
+
+    def __repr__(self):
+        return f"Environment({dict(self.items())!r})"
+
+    def __eq__(self, other):
+        # Compares the visible variables, not just this environment's writes
+        if not isinstance(other, dict):
+            return NotImplemented
+        return self.copy() == (other.copy() if isinstance(other, Environment) else other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def setdefault(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            self[name] = default
+            return default
+
+    def pop(self, name, *default):
+        try:
+            value = self[name]
+        except KeyError:
+            if default:
+                return default[0]
+            raise
+        del self[name]
+        return value
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return [self[name] for name in self]
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def copy(self):
+        # Returns the visible variables as a plain dictionary
+        return dict(self.items())
+
+    def clear(self):
+        dict.clear(self)
+        self.deleted = set(self.parent)
+
+
+class Snapshot:
+    """Frozen interpreter variables that new interpreters fork from."""
+
+    def __init__(self, variables):
+        # Private copy, so nothing can change it after freezing
+        self.variables = dict(variables.items())
+
+    def fork(self):
+        # Returns a new interpreter whose variables start as the snapshot's
+        return Interpreter(Environment(self.variables))
+
+
+def freeze(interpreter):
+    # Freezes the current variables of an interpreter
+    return Snapshot(interpreter.global_vars)
+
+
+def run_prelude(text, global_vars=None):
+    # Runs a prelude script once and freezes the variables it leaves behind
+    interpreter = Interpreter(dict(global_vars or {}))
+    tree = Parser(text).program()
+    check(tree, interpreter.global_vars)
+    interpreter.visit(tree)
+    return freeze(interpreter)
@@ -0,0 +1,245 @@
+# incremental.py
+from parser import Parser
+from lexer import Lexer
+from interpreter import Interpreter
+from ast_nodes import Block, walk, copy_location
+from scheduler import read_write_sets
+
+# A line starting with one of these can only continue the statement
+# before it, so the newline in front of it is never a statement boundary.
+# Some of them ('-', '!', '(') can also start a statement; treating those
+# as continuations too only merges chunks, which is always safe
+CONTINUATION_CHARS = frozenset('+-*/<>=!(){}')
+CONTINUATION_WORDS = frozenset(('else', 'then', 'and', 'or'))
+
+# Stands in for a variable that was not set before a chunk ran
+ABSENT = object()
+
+# Most chunks joined to complete one statement before the rest of the
+# source is parsed in one go
+MAX_JOINED = 64
+
+
+class IncompleteChunk(Exception):
+    # A chunk the parser ran out of tokens in, which the chunks after it
+    # may complete
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+def starts_statement(line):
+    # Checks whether a line can begin a new top level statement
+    stripped = line.lstrip()
+    if not stripped or stripped[0] in CONTINUATION_CHARS:
+        return False
+    end = 0
+    while end < len(stripped) and (stripped[end].isalnum() or stripped[end] == '_'):
+        end += 1
+    return stripped[:end].lower() not in CONTINUATION_WORDS
+
+
+def split_statements(text):
+    """Split source text into chunks of top level statements.
+
+    Chunks are cut only at newlines outside braces and string literals,
+    and only in front of a line that can start a statement. Joining the
+    chunks gives back the original text.
+    """
+    chunks = []
+    current = []
+    depth = 0
+    in_string = False
+    for line in text.splitlines(keepends=True):
+        if current and depth == 0 and not in_string and starts_statement(line):
+            chunks.append(''.join(current))
+            current = []
+        current.append(line)
+
+        # Most lines have no quotes or braces, so skip the character scan
+        if not in_string and '"' not in line and '{' not in line and '}' not in line:
+            continue
+        pos = 0
+        while pos < len(line):
+            char = line[pos]
+            if in_string:
+                if char == '\\':
+                    pos += 1
+                elif char == '"':
+                    in_string = False
+            elif char == '"':
+                in_string = True
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+            pos += 1
+    if current:
+        chunks.append(''.join(current))
+    return chunks
+
+
+class IncrementalSession:
+    """Re-parses and re-runs a script that is edited between runs.
+
+    Each chunk from split_statements is parsed once and its statements
+    are cached by chunk text, so after an edit only the changed chunks
+    are lexed and parsed again. Before each chunk runs, the values of the
+    variables it can write are saved in an undo log, so run() can rewind
+    global_vars to the first changed chunk and restart there instead of
+    from the top of the script. The log holds one entry per variable a
+    chunk writes, not a copy of every variable.
+    """
+
+    def __init__(self, interpreter=None):
+        self.interpreter = interpreter if interpreter is not None else Interpreter()
+        # Chunk text -> [(parsed statements, line the chunk started on)],
+        # one entry per time the chunk appears, so no two places in a
+        # program share nodes
+        self.cache = {}
+        # Chunk texts that only parse when joined with the next chunk
+        self.incomplete = set()
+        # Chunks and results of the last run
+        self.chunks = []
+        self.results = []
+        # For each chunk that ran, the values its variables had before it
+        # ran, ABSENT for ones that were not set
+        self.undo = []
+
+    def parse_chunk(self, text, line, available, cache):
+        """Parse a chunk starting on the given line.
+
+        Reuses the statements of an entry in available, the unused part
+        of the old cache, and records the result in cache, the cache
+        being built for this version of the source. Raises
+        IncompleteChunk when the parser ran out of tokens, since the
+        next chunk may then complete it.
+        """
+        entries = available.get(text)
+        if entries:
+            # Prefer an entry that has not moved
+            index = next((i for i, entry in enumerate(entries) if entry[1] == line), 0)
+            statements, cached_line = entries.pop(index)
+            if cached_line != line:
+                # The chunk moved, so its nodes move with it
+                for stmt in statements:
+                    for node in walk(stmt):
+                        if node.line is not None:
+                            node.line += line - cached_line
+        else:
+            parser = Parser(text, Lexer(text, line))
+            try:
+                statements = parser.program().statements
+            except Exception as error:
+                if parser.tokens.lexed_to_end():
+                    raise IncompleteChunk(error)
+                raise
+        cache.setdefault(text, []).append((statements, line))
+        return statements
+
+    def parse(self, text):
+        # Returns a list of (chunk text, statements) pairs for the source
+        parsed = []
+        incomplete = set()
+        available = {chunk: list(entries) for chunk, entries in self.cache.items()}
+        cache = {}
+        # Chunks waiting to be completed by the ones after them
+        pending = []
+        line = start_line = 1
+        chunks = split_statements(text)
+        for index, chunk in enumerate(chunks):
+            if not pending:
+                start_line = line
+            pending.append(chunk)
+            line += chunk.count('\n')
+            if len(pending) > MAX_JOINED:
+                # Stop joining one chunk at a time, the rest of the
+                # source either completes the statement or fails
+                pending = chunks[index - len(pending) + 1:]
+                break
+            source = ''.join(pending)
+            if source in self.incomplete:
+                incomplete.add(source)
+                continue
+            try:
+                statements = self.parse_chunk(source, start_line, available, cache)
+            except IncompleteChunk as error:
+                # The last chunk has nothing left to join with, so its
+                # error is the real syntax error
+                if index == len(chunks) - 1:
+                    raise error.error
+                incomplete.add(source)
+                continue
+            parsed.append((source, statements))
+            pending = []
+        if pending:
+            # Only reached when the remainder is a known incomplete chunk,
+            # or too many chunks were joined
+            source = ''.join(pending)
+            try:
+                statements = self.parse_chunk(source, start_line, available, cache)
+            except IncompleteChunk as error:
+                raise error.error
+            parsed.append((source, statements))
+
+        # Keep only the entries this version of the source uses, so the
+        # caches do not grow with every edit
+        self.cache = cache
+        self.incomplete = incomplete
+        return parsed
+
+    def program(self, text):
+        # Parses the full source into a single block, like Parser.program()
+        statements = []
+        for chunk, chunk_statements in self.parse(text):
+            statements.extend(chunk_statements)
+        if statements:
+            return copy_location(Block(statements), statements[0])
+        return Block(statements)
+
+    def run(self, text, resume=True):
+        """Run the edited source and return the value of its last statement.
+
+        With resume, execution restarts at the first chunk that differs
+        from the last run, from the variables as they were at that point.
+        Without it, the whole script runs again from the variables as
+        they were before the first run.
+        """
+        parsed = self.parse(text)
+        global_vars = self.interpreter.global_vars
+
+        start = 0
+        if resume:
+            limit = min(len(parsed), len(self.chunks))
+            while start < limit and parsed[start][0] == self.chunks[start]:
+                start += 1
+
+        # Rewind in place, callers may hold a reference to global_vars
+        self.rewind(start)
+        chunks = [chunk for chunk, statements in parsed]
+        results = self.results[:start]
+        try:
+            for index in range(start, len(parsed)):
+                statements = parsed[index][1]
+                written = set()
+                for stmt in statements:
+                    written |= read_write_sets(stmt)[1]
+                self.undo.append({name: global_vars.get(name, ABSENT) for name in written})
+                results.append(self.interpreter.visit(Block(statements)))
+        finally:
+            # Only the chunks that ran to completion can be resumed from,
+            # a failed one is still rewound by its undo entry
+            self.chunks = chunks[:len(results)]
+            self.results = results
+        return results[-1] if results else None
+
+    def rewind(self, start):
+        # Undoes the chunks from start on, last first, restoring the
+        # variables to what they were before chunk start ran
+        global_vars = self.interpreter.global_vars
+        while len(self.undo) > start:
+            for name, value in self.undo.pop().items():
+                if value is ABSENT:
+                    global_vars.pop(name, None)
+                else:
+                    global_vars[name] = value
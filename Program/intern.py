@@ -0,0 +1,58 @@
+# intern.py
+import sys
+
+
+class InternPool(object):
+    """Shares one object between equal identifiers, strings and numbers.
+
+    Every program the lexer reads in this process goes through the same
+    pool, so equal names and constants in the tokens and AST nodes of
+    different programs are the same object. Values are keyed by type as
+    well as value, so 1, 1.0 and True stay apart. Identifiers are also
+    passed through sys.intern, which lets dict lookups of variable names
+    match by identity. The pool holds at most limit values; once it is
+    full, new values are returned as they are and counted as rejected.
+    """
+
+    def __init__(self, limit=1 << 16):
+        self.limit = limit
+        self.values = {}
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def intern(self, value):
+        # Returns the pooled object equal to value, adding value if there is room
+        key = (type(value), value)
+        pooled = self.values.get(key)
+        if pooled is not None:
+            self.hits += 1
+            return pooled
+        if len(self.values) >= self.limit:
+            self.rejected += 1
+            return value
+        self.misses += 1
+        self.values[key] = value
+        return value
+
+    def name(self, word):
+        # Returns the pooled identifier for word
+        return self.intern(sys.intern(word))
+
+    def clear(self):
+        self.values.clear()
+        self.hits = self.misses = self.rejected = 0
+
+    def statistics(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'rejected': self.rejected,
+            'size': len(self.values),
+            'limit': self.limit,
+        }
+
+
+# The pool shared by every lexer in the process
+POOL = InternPool()
@@ -7,6 +7,8 @@ class Interpreter:
     def __init__(self, global_vars=None):
         # Initializes interpreter with the globabl variables
         self.global_vars = global_vars if global_vars is not None else {}
+        # Hidden temporaries holding shared subexpressions, by memo slot
+        self.temps = {}
 
     def visit(self, node):
         # Dispatch method to call appropriate method
@@ -31,26 +33,36 @@ class Interpreter:
         return node.value
 
     def visit_Var(self, node): 
-        # Looks for variable in dictionary
-        if node.name in self.global_vars:
+        # Looks for variable in dictionary, with a single lookup so forked
+        # environments only fall back to their parent on a miss
+        try:
             return self.global_vars[node.name]
-        # Raises exception if variable doesn't exist
-        raise Exception(f"Undefined variable '{node.name}'")
+        except KeyError:
+            # Raises exception if variable doesn't exist
+            raise Exception(f"Undefined variable '{node.name}'") from None
 
     def visit_Assign(self, node):
         # Evaluates right hand side expression
         val = self.visit(node.expr)
         # Assigns the value to the variable in the dictionary
         self.global_vars[node.name] = val
+        # Forget shared subexpressions that read the old value
+        if node.kills:
+            self.invalidate(node.kills)
         return val
 
     def visit_Delete(self, node):
         # Remove variable from dictionary if it exists
         if node.name in self.global_vars:
             del self.global_vars[node.name]
+        if node.kills:
+            self.invalidate(node.kills)
         return None
 
     def visit_BinOp(self, node):
+        # Operands with types known before running skip the operator chain
+        if node.impl is not None:
+            return node.impl(self.visit(node.left), self.visit(node.right))
         # Evaluates left and right
         left = self.visit(node.left)
         right = self.visit(node.right)
@@ -78,13 +90,17 @@ class Interpreter:
             return left <= right
         if op_type == GE:
             return left >= right
-        if op_type == AND:
-            return left and right
-        if op_type == OR:
-            return left or right
 
         raise Exception(f"Unknown operator {op_type}")
 
+    def visit_And(self, node):
+        # Short circuits, skipping the right side when the left is false
+        return self.visit(node.left) and self.visit(node.right)
+
+    def visit_Or(self, node):
+        # Short circuits, skipping the right side when the left is true
+        return self.visit(node.left) or self.visit(node.right)
+
     def visit_UnaryOp(self, node):
         # Evaluates the expression to apply the unary operator
         val = self.visit(node.expr)
@@ -107,6 +123,8 @@ class Interpreter:
         val = input(f"{node.var_name}> ")
         # Store the input under variable name
         self.global_vars[node.var_name] = val
+        if node.kills:
+            self.invalidate(node.kills)
         return val
 
     def visit_If(self, node):
@@ -114,15 +132,77 @@ class Interpreter:
         if self.visit(node.cond):
             # If true, eavluate and return then
             return self.visit(node.then_expr)
-        else:
+        elif node.else_expr is not None:
             # Otherwise return else
             return self.visit(node.else_expr)
+        # An if without else does nothing when false
+        return None
 
     def visit_While(self, node):
         # Keep executing the body while its condition is true
         while self.visit(node.cond):
             self.visit(node.body)
 
+    def visit_Increment(self, node):
+        # Fused name = name + constant
+        global_vars = self.global_vars
+        try:
+            val = node.op(global_vars[node.name], node.amount)
+        except KeyError:
+            raise Exception(f"Undefined variable '{node.name}'") from None
+        global_vars[node.name] = val
+        if node.kills:
+            self.invalidate(node.kills)
+        return val
+
+    def visit_Accumulate(self, node):
+        # Fused name = name <op> expr, reading name before expr like the
+        # unfused assignment does
+        global_vars = self.global_vars
+        try:
+            current = global_vars[node.name]
+        except KeyError:
+            raise Exception(f"Undefined variable '{node.name}'") from None
+        val = node.op(current, self.visit(node.expr))
+        global_vars[node.name] = val
+        if node.kills:
+            self.invalidate(node.kills)
+        return val
+
+    def visit_CompareVars(self, node):
+        # Fused comparison of two variables
+        global_vars = self.global_vars
+        try:
+            left = global_vars[node.left]
+        except KeyError:
+            raise Exception(f"Undefined variable '{node.left}'") from None
+        try:
+            right = global_vars[node.right]
+        except KeyError:
+            raise Exception(f"Undefined variable '{node.right}'") from None
+        return node.op(left, right)
+
+    def visit_CompareConst(self, node):
+        # Fused comparison of a variable with a constant
+        try:
+            return node.op(self.global_vars[node.name], node.value)
+        except KeyError:
+            raise Exception(f"Undefined variable '{node.name}'") from None
+
+    def visit_Memo(self, node):
+        # Reuses the temporary if it is still valid
+        temps = self.temps
+        if node.slot in temps:
+            return temps[node.slot]
+        val = self.visit(node.expr)
+        temps[node.slot] = val
+        return val
+
+    def invalidate(self, slots):
+        # Drops the temporaries of the given memo slots
+        for slot in slots:
+            self.temps.pop(slot, None)
+
     def visit_Block(self, node):
         # Execute block in order
         result = None
@@ -5,17 +5,24 @@ from tokens import (
     STRING, IDENTIFIER, ASSIGN, DEL, IF, THEN, ELSE, WHILE, INPUT,
     LBRACE, RBRACE
 )
+from intern import POOL
 
 class Lexer(object):
-    def __init__(self, text):
+    def __init__(self, text, line=1):
         # Initialize the lexer with input source text
         self.text = text
         # Current position
         self.pos = 0
+        # Current line, and the position where it starts
+        self.first_line = line
+        self.line = line
+        self.line_start = 0
 
     def reset(self, pos):
-        # Reset position to given value
+        # Reset position to given value, and the line it is on
         self.pos = pos
+        self.line = self.first_line + self.text.count('\n', 0, pos)
+        self.line_start = self.text.rfind('\n', 0, pos) + 1
 
     def error(self):
         raise Exception('Invalid character')
@@ -33,6 +40,9 @@ class Lexer(object):
     def skip_whitespace(self):
         # Sky over any whitespace
         while self.pos < len(self.text) and self.text[self.pos].isspace():
+            if self.text[self.pos] == '\n':
+                self.line += 1
+                self.line_start = self.pos + 1
             self.advance()
 
     def number(self):
@@ -50,12 +60,29 @@ class Lexer(object):
             self.advance()
         if dot_count == 0:
             # No decimal equals integer
-            return Token(INTEGER, int(result))
+            return Token(INTEGER, POOL.intern(int(result)))
         else:
             # Decimal equals float
-            return Token(INTEGER, float(result))
+            return Token(INTEGER, POOL.intern(float(result)))
 
     def get_next_token(self):
+        # Returns the next token, tagged with the line and column it starts at
+        self.skip_whitespace()
+        line = self.line
+        column = self.pos - self.line_start + 1
+        token = self.lex_token()
+        token.line = line
+        token.column = column
+        if token.type == STRING:
+            # Strings are the only tokens that can span lines
+            newlines = self.text.count('\n', self.line_start, self.pos)
+            if newlines:
+                self.line += newlines
+                self.line_start = self.text.rfind('\n', 0, self.pos) + 1
+        return token
+
+    def lex_token(self):
+        # Lexes the token at the current position
         while self.pos < len(self.text):
             current_char = self.text[self.pos]
 
@@ -168,7 +195,7 @@ class Lexer(object):
                 elif word == "del":
                     return Token(DEL, 'del')
                 else:
-                    return Token(IDENTIFIER, word)
+                    return Token(IDENTIFIER, POOL.name(word))
 
             # Detects string by speech marks
             if current_char == '"':
@@ -197,9 +224,34 @@ class Lexer(object):
                 if self.pos >= len(self.text):
                     self.error()
                 self.advance()
-                return Token(STRING, result)
+                return Token(STRING, POOL.intern(result))
 
             self.error()
 
         # If no more characters, return End of Input
         return Token(EOF, None)
+
+    def tokenize(self):
+        # Lexes the rest of the input, returning every token up to and
+        # including the end of input
+        tokens = []
+        token = self.get_next_token()
+        while token.type != EOF:
+            tokens.append(token)
+            token = self.get_next_token()
+        tokens.append(token)
+        return tokens
+
+
+class TokenListLexer(object):
+    def __init__(self, tokens):
+        # Serves tokens that were already lexed, in place of a Lexer
+        self.tokens = tokens
+        self.index = 0
+
+    def get_next_token(self):
+        # Returns the next token, repeating the final end of input token
+        token = self.tokens[self.index]
+        if self.index < len(self.tokens) - 1:
+            self.index += 1
+        return token
@@ -1,23 +1,125 @@
 from parser import Parser
 from interpreter import Interpreter
+from typecheck import check
+from optimizer import optimize
+from stats import run_with_stats, format_stats
+from scheduler import run_parallel
+from profiler import SamplingProfiler
+from parallel_lex import parallel_lexer
+from debugger import Debugger
+from checkpoint import Checkpointer, source_key
+import os
+import argparse
 import sys
 
+# Shows what the optimisation passes changed
+def print_report(report):
+    for line in report:
+        print(line, file=sys.stderr)
+
 # Runs the program
-def run(text, interpreter):
-    parser = Parser(text) # Create a parset instance
+def run(text, interpreter, optimise=False, verbose=False, jobs=1, lex_jobs=1, debugger=None, checkpointer=None):
+    lexer = parallel_lexer(text, lex_jobs) if lex_jobs > 1 else None # Lex large files in parallel
+    parser = Parser(text, lexer) # Create a parset instance
     ast = parser.program()  # parse all statements into an AST
+    check(ast, interpreter.global_vars) # Report type errors before running
+    if optimise:
+        report = []
+        ast = optimize(ast, report) # Rewrite the AST before running it
+        if verbose:
+            print_report(report)
+        interpreter.temps.clear() # Temporaries only live for one run
+    if debugger is not None:
+        return debugger.run(ast) # Run under the debugger, stopping before the first statement
+    if checkpointer is not None:
+        return checkpointer.run(ast) # Run saving checkpoints, or resume from the last one
+    if jobs > 1:
+        return run_parallel(ast, interpreter, jobs) # Run independent statements in parallel
     return interpreter.visit(ast) #Interpret AST
 
 def main():
+    # Reads the command line options
+    arg_parser = argparse.ArgumentParser(description='Run a program in the language')
+    arg_parser.add_argument('file', nargs='?', help='program to run, omit for an interactive prompt')
+    arg_parser.add_argument('-O', '--optimize', action='store_true', help='optimise the program before running it')
+    arg_parser.add_argument('-v', '--verbose', action='store_true', help='report what the optimiser changed')
+    arg_parser.add_argument('--stats', action='store_const', const='text',
+                            help='report time and memory used by each phase of running a file')
+    arg_parser.add_argument('--stats-json', dest='stats', action='store_const', const='json',
+                            help='like --stats, formatted as JSON')
+    arg_parser.add_argument('-j', '--jobs', type=int, default=1,
+                            help='run independent top level statements in this many processes')
+    arg_parser.add_argument('--lex-jobs', type=int, default=1, metavar='N',
+                            help='lex large files in chunks across this many processes')
+    arg_parser.add_argument('--profile', metavar='OUTPUT',
+                            help='sample the running script and write collapsed stacks for a flame graph')
+    arg_parser.add_argument('--profile-interval', type=float, default=0.005, metavar='SECONDS',
+                            help='time between profiler samples')
+    arg_parser.add_argument('--debug', action='store_true',
+                            help='step through the file with breakpoints and watchpoints')
+    arg_parser.add_argument('--checkpoint', metavar='FILE',
+                            help='save the running state to FILE now and then, removing it when the file finishes')
+    arg_parser.add_argument('--checkpoint-steps', type=int, default=10000, metavar='N',
+                            help='checkpoint at least every N statements')
+    arg_parser.add_argument('--checkpoint-seconds', type=float, default=60.0, metavar='T',
+                            help='checkpoint at least every T seconds')
+    arg_parser.add_argument('--resume', action='store_true',
+                            help='continue from the last checkpoint in the --checkpoint file, if there is one')
+    args = arg_parser.parse_args()
+    if args.stats and args.file is None:
+        arg_parser.error('--stats needs a file to run')
+    if args.profile and args.file is None:
+        arg_parser.error('--profile needs a file to run')
+    if args.stats and (args.profile or args.debug or args.jobs > 1 or args.lex_jobs > 1):
+        arg_parser.error('--stats measures a plain run, it cannot be used with --profile, --debug, --jobs or --lex-jobs')
+    if args.profile and args.jobs > 1:
+        arg_parser.error('--profile samples this process, it cannot be used with --jobs')
+    if args.debug and args.file is None:
+        arg_parser.error('--debug needs a file to run')
+    if args.debug and args.jobs > 1:
+        arg_parser.error('--debug runs statements in order, it cannot be used with --jobs')
+    if args.checkpoint and (args.file is None or args.stats):
+        arg_parser.error('--checkpoint needs a file to run, without --stats')
+    if args.checkpoint and (args.debug or args.jobs > 1):
+        arg_parser.error('--checkpoint cannot be used with --debug or --jobs')
+    if args.resume and not args.checkpoint:
+        arg_parser.error('--resume needs --checkpoint FILE')
+
     global_vars = {} # Dictionary holds variables
     interpreter = Interpreter(global_vars) # Create interpreter with variable
     
     # Checks if file path is provided as a command line argument
-    if len(sys.argv) == 2:
-        file_path = sys.argv[1] # Gets fle path
+    if args.stats:
+        # Runs the file phase by phase, printing statistics even if it fails
+        stats = {}
+        report = []
+        try:
+            result = run_with_stats(args.file, global_vars, stats, args.optimize, report)
+        finally:
+            if args.verbose:
+                print_report(report)
+            print(format_stats(stats, args.stats), file=sys.stderr)
+        if result is not None:
+            print(result)
+    elif args.file is not None:
+        file_path = args.file # Gets fle path
         with open(file_path, 'r') as f:
             text = f.read()  # Reads file
-        result = run(text, interpreter) # Parse and run the file
+        debugger = Debugger(interpreter, text, os.path.basename(file_path)) if args.debug else None
+        checkpointer = None
+        if args.checkpoint:
+            checkpointer = Checkpointer(interpreter, args.checkpoint, source_key(text, args.optimize),
+                                        args.checkpoint_steps, args.checkpoint_seconds, args.resume)
+        if args.profile:
+            # Samples the script's lines while it runs
+            profiler = SamplingProfiler(os.path.basename(file_path), args.profile_interval)
+            try:
+                with profiler:
+                    result = run(text, interpreter, args.optimize, args.verbose, args.jobs, args.lex_jobs, debugger, checkpointer)
+            finally:
+                profiler.write(args.profile)
+        else:
+            result = run(text, interpreter, args.optimize, args.verbose, args.jobs, args.lex_jobs, debugger, checkpointer) # Parse and run the file
         if result is not None:
             print(result) # Print any results
     else:
@@ -28,7 +130,7 @@ def main():
                 break # Exit loop on EOF
             if not text.strip():
                 continue # Ignore empty lines
-            result = run(text, interpreter) # Parse and run user input
+            result = run(text, interpreter, args.optimize, args.verbose, args.jobs) # Parse and run user input
             if result is not None:
                 print(result) # Print any results
 
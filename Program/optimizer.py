@@ -0,0 +1,13 @@
+# optimizer.py
+from deadcode import eliminate_dead_code
+from cse import eliminate_common_subexpressions
+from peephole import fuse_idioms
+
+
+def optimize(tree, report=None):
+    # Runs the optimisation passes over a type checked program.
+    # Each pass appends a line describing what it changed to report
+    tree = eliminate_dead_code(tree, report)
+    tree = eliminate_common_subexpressions(tree, report)
+    tree = fuse_idioms(tree, report)
+    return tree
@@ -0,0 +1,159 @@
+# parallel_lex.py
+import os
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from tokens import *
+from lexer import Lexer
+from intern import POOL
+
+# Token types by their one byte code in the compact token arrays
+TYPES = (
+    INTEGER, PLUS, MINUS, MUL, DIV, LPAREN, RPAREN, TRUE, FALSE, AND, OR,
+    NOT, LT, GT, LE, GE, EQ, NEQ, STRING, IDENTIFIER, ASSIGN, DEL, IF,
+    THEN, ELSE, WHILE, INPUT, LBRACE, RBRACE,
+)
+CODES = {token_type: code for code, token_type in enumerate(TYPES)}
+
+# Inputs smaller than this are lexed in this process
+CHUNK_SIZE = 1 << 20
+
+
+def string_spans(text):
+    """Find where the string literals of a source text are.
+
+    Returns the sorted start positions and matching end positions (one
+    past the closing quote) of every string. Only the quote characters
+    are visited, using str.find, so the scan runs at C speed. A quote
+    inside a string is escaped when an odd number of backslashes come
+    right before it.
+    """
+    starts = []
+    ends = []
+    pos = text.find('"')
+    while pos != -1:
+        end = pos + 1
+        while True:
+            end = text.find('"', end)
+            if end == -1:
+                # Unterminated, the lexer reports it
+                end = len(text)
+                break
+            backslashes = 0
+            while text[end - 1 - backslashes] == '\\':
+                backslashes += 1
+            if backslashes % 2 == 0:
+                end += 1
+                break
+            end += 1
+        starts.append(pos)
+        ends.append(end)
+        pos = text.find('"', end) if end < len(text) else -1
+    return starts, ends
+
+
+def split_points(text, chunk_size=CHUNK_SIZE):
+    # Returns the positions after newlines outside strings where the
+    # text can be cut into chunks of about chunk_size characters
+    starts, ends = string_spans(text)
+    points = []
+    target = chunk_size
+    while target < len(text):
+        newline = text.find('\n', target)
+        while newline != -1:
+            index = bisect_right(starts, newline) - 1
+            if index < 0 or ends[index] <= newline:
+                break
+            # Inside a string, try the first newline after it
+            newline = text.find('\n', ends[index])
+        if newline == -1:
+            break
+        points.append(newline + 1)
+        target = newline + 1 + chunk_size
+    return points
+
+
+def lex_chunk(text, line):
+    """Lex one chunk into compact arrays.
+
+    Returns the token type codes as bytes, the token values, and the
+    lines and columns as arrays, which are much cheaper to send between
+    processes than Token objects. The end of input token is left out. If
+    the lexer fails, the tokens before the failure are returned with its
+    error message, so the error is raised only when the parser gets there.
+    """
+    lexer = Lexer(text, line)
+    types = bytearray()
+    values = []
+    lines = array('I')
+    columns = array('I')
+    error = None
+    try:
+        token = lexer.get_next_token()
+        while token.type != EOF:
+            types.append(CODES[token.type])
+            values.append(token.value)
+            lines.append(token.line)
+            columns.append(token.column)
+            token = lexer.get_next_token()
+    except Exception as failure:
+        error = str(failure)
+    return bytes(types), values, lines, columns, error
+
+
+class ArrayLexer(object):
+    """Serves tokens from compact token arrays, in place of a Lexer.
+
+    Token objects are only made as the parser asks for them.
+    """
+
+    def __init__(self, chunks, end):
+        self.chunks = chunks
+        self.chunk = 0
+        self.index = 0
+        # The end of input token
+        self.end = end
+
+    def get_next_token(self):
+        while self.chunk < len(self.chunks):
+            types, values, lines, columns, error = self.chunks[self.chunk]
+            if self.index < len(types):
+                index = self.index
+                self.index += 1
+                token_type = TYPES[types[index]]
+                value = values[index]
+                # Workers filled their own pools, share this process's instead
+                if token_type == IDENTIFIER:
+                    value = POOL.name(value)
+                elif token_type in (INTEGER, STRING):
+                    value = POOL.intern(value)
+                return Token(token_type, value, lines[index], columns[index])
+            if error is not None:
+                raise Exception(error)
+            self.chunk += 1
+            self.index = 0
+        return self.end
+
+
+def parallel_lexer(text, jobs=None, chunk_size=CHUNK_SIZE):
+    """Return a lexer for text, lexing it in a process pool if it is large.
+
+    The text is cut at newlines outside strings into chunks of about
+    chunk_size characters, which are lexed in parallel and joined back in
+    order. Small inputs get a plain Lexer, and so does any text with the
+    \\e escape, since lexing that exits the program straight away.
+    """
+    if '\\e' in text:
+        return Lexer(text)
+    points = split_points(text, chunk_size)
+    if not points:
+        return Lexer(text)
+    bounds = [0] + points + [len(text)]
+    texts = [text[start:end] for start, end in zip(bounds, bounds[1:])]
+    lines = [1]
+    for chunk in texts[:-1]:
+        lines.append(lines[-1] + chunk.count('\n'))
+    with ProcessPoolExecutor(max_workers=jobs or os.cpu_count()) as pool:
+        chunks = list(pool.map(lex_chunk, texts, lines))
+    end = Token(EOF, None, lines[-1] + texts[-1].count('\n'), len(text) - text.rfind('\n'))
+    return ArrayLexer(chunks, end)
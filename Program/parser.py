@@ -1,14 +1,18 @@
 # # Imports statements
 from tokens import *
 from lexer import Lexer
+from tokenstream import TokenStream
 from ast_nodes import *
 
 class Parser:
-    def __init__(self, text):
-        # Initialise parser with text, creates lexer intance
-        self.lexer = Lexer(text)
+    def __init__(self, text, lexer=None):
+        # Initialise parser with text, creates lexer intance unless one
+        # is given, such as a TokenListLexer over pre-lexed tokens
+        self.lexer = lexer if lexer is not None else Lexer(text)
+        # Buffers tokens so statements can look past the current one
+        self.tokens = TokenStream(self.lexer)
         # Assigns current token to the next token
-        self.current_token = self.lexer.get_next_token()
+        self.current_token = self.tokens.peek()
 
     def error(self):
         # Syntax error exception
@@ -18,32 +22,41 @@ class Parser:
         # Consume current token
         if self.current_token.type == token_type:
             # Move to next token
-            self.current_token = self.lexer.get_next_token()
+            self.tokens.advance()
+            self.current_token = self.tokens.peek()
         else:
             self.error()
 
+    def at(self, token, node):
+        # Tags a node with the source position of the token it starts at,
+        # unless it already has one, like a parenthesised expression
+        if node.line is None:
+            node.line = token.line
+            node.column = token.column
+        return node
+
     def factor(self):
         # Parse factor
         token = self.current_token
 
         if token.type == NOT:
             self.eat(NOT)
-            return UnaryOp(token, self.factor())
+            return self.at(token, UnaryOp(token, self.factor()))
         elif token.type == MINUS:
             self.eat(MINUS)
-            return UnaryOp(token, self.factor())
+            return self.at(token, UnaryOp(token, self.factor()))
         elif token.type == INTEGER:
             self.eat(INTEGER)
-            return Num(token.value)
+            return self.at(token, Num(token.value))
         elif token.type == TRUE:
             self.eat(TRUE)
-            return Bool(True)
+            return self.at(token, Bool(True))
         elif token.type == FALSE:
             self.eat(FALSE)
-            return Bool(False)
+            return self.at(token, Bool(False))
         elif token.type == STRING:
             self.eat(STRING)
-            return Str(token.value)
+            return self.at(token, Str(token.value))
         elif token.type == LPAREN:
             self.eat(LPAREN)
             node = self.expr()
@@ -52,10 +65,10 @@ class Parser:
         elif token.type == IDENTIFIER:
             name = token.value
             self.eat(IDENTIFIER)
-            return Var(name)
+            return self.at(token, Var(name))
         elif token.type == DEL:
             self.eat(DEL)
-            return Var("DEL")
+            return self.at(token, Var("DEL"))
         elif token.type == INPUT:
             self.eat(INPUT)
             if self.current_token.type == LPAREN:
@@ -66,71 +79,79 @@ class Parser:
                 else:
                     prompt = None
                 self.eat(RPAREN)
-                return Input(prompt)
+                return self.at(token, Input(prompt))
             else:
-                return Input(None)
+                return self.at(token, Input(None))
         else:
             self.error()
 
     def term(self):
         # Parse term
+        start = self.current_token
         node = self.factor()
         while self.current_token.type in (MUL, DIV):
             op = self.current_token
             self.eat(op.type)
-            node = BinOp(node, op, self.factor())
+            node = self.at(start, BinOp(node, op, self.factor()))
         return node
 
     def arith_expr(self):
         # Parse arithmetic expression
+        start = self.current_token
         node = self.term()
         while self.current_token.type in (PLUS, MINUS):
             op = self.current_token
             self.eat(op.type)
-            node = BinOp(node, op, self.term())
+            node = self.at(start, BinOp(node, op, self.term()))
         return node
 
     def comparison(self):
         # Parse comparison expressions
+        start = self.current_token
         node = self.arith_expr()
         while self.current_token.type in (LT, LE, GT, GE):
             op = self.current_token
             self.eat(op.type)
-            node = BinOp(node, op, self.arith_expr())
+            node = self.at(start, BinOp(node, op, self.arith_expr()))
         return node
 
     def equality(self):
         # Parse equality expressions
+        start = self.current_token
         node = self.comparison()
         while self.current_token.type in (EQ, NEQ):
             op = self.current_token
             self.eat(op.type)
-            node = BinOp(node, op, self.comparison())
+            node = self.at(start, BinOp(node, op, self.comparison()))
         return node
 
     def logical_and(self):
         # Parse logical and expressions
+        start = self.current_token
         node = self.equality()
         while self.current_token.type == AND:
-            op = self.current_token
             self.eat(AND)
-            node = BinOp(node, op, self.equality())
+            node = self.at(start, And(node, self.equality()))
         return node
 
     def logical_or(self):
         # Parse logical or expressions
+        start = self.current_token
         node = self.logical_and()
         while self.current_token.type == OR:
-            op = self.current_token
             self.eat(OR)
-            node = BinOp(node, op, self.logical_and())
+            node = self.at(start, Or(node, self.logical_and()))
         return node
 
     def expr(self):
         return self.logical_or()
 
     def statement(self):
-        # Parse a statement
+        # Parse a statement, tagged with where it starts
+        start = self.current_token
+        return self.at(start, self.statement_node())
+
+    def statement_node(self):
         if self.current_token.type == IF:
             self.eat(IF)
             cond = self.expr()
@@ -151,20 +172,22 @@ class Parser:
             body = self.statement() if self.current_token.type != LBRACE else self.block()
             return While(cond, body)
 
-        elif self.current_token.type == IDENTIFIER:
+        elif self.current_token.type == IDENTIFIER and self.tokens.peek(1).type == ASSIGN:
+            # Assignment statement
             name = self.current_token.value
             self.eat(IDENTIFIER)
+            self.eat(ASSIGN)
+            expr = self.expr()
+            # Special instance for deleting variables
+            if isinstance(expr, Var) and expr.name == "DEL":
+                return Delete(name)
+            return Assign(name, expr)
 
-            if self.current_token.type == ASSIGN:
-                # Assignment statement
-                self.eat(ASSIGN)
-                expr = self.expr()
-                # Special instance for deleting variables
-                if isinstance(expr, Var) and expr.name == "DEL":
-                    return Delete(name)
-                return Assign(name, expr)
+        elif self.current_token.type == IDENTIFIER:
+            name = self.current_token.value
+            self.eat(IDENTIFIER)
 
-            elif name == "print":
+            if name == "print":
                 # Print statements
                 return Print(self.expr())
 
@@ -180,15 +203,17 @@ class Parser:
     def block(self):
         # Parse block of statements
         statements = []
+        start = self.current_token
         self.eat(LBRACE)
         while self.current_token.type != RBRACE:
             statements.append(self.statement())
         self.eat(RBRACE)
-        return Block(statements)
+        return self.at(start, Block(statements))
     
     def program(self):
         # Parse program as sequence
         statements = []
+        start = self.current_token
         while self.current_token.type != EOF:
             statements.append(self.statement())
-        return Block(statements)
+        return self.at(start, Block(statements))
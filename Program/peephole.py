@@ -0,0 +1,79 @@
+# peephole.py
+from tokens import *
+from ast_nodes import *
+from typecheck import OPERATORS
+
+ARITHMETIC = (PLUS, MINUS, MUL, DIV)
+COMPARISONS = (EQ, NEQ, LT, GT, LE, GE)
+
+
+class PeepholeOptimizer:
+    """Rewrites common statement idioms into fused nodes.
+
+    name = name + 1 becomes Increment, name = name + expr becomes
+    Accumulate, and comparisons of a variable with another variable or
+    a number become CompareVars and CompareConst. Each fused node reads
+    its variables straight from global_vars with its own visit method,
+    instead of going through visit_Assign, visit_BinOp and a visit per
+    operand. They evaluate in the same order as the nodes they replace,
+    so results and errors are unchanged.
+    """
+
+    def __init__(self):
+        self.fused = {}
+
+    def count(self, form):
+        self.fused[form] = self.fused.get(form, 0) + 1
+
+    def rewrite(self, node):
+        # Rewrites the children of node, then node itself
+        for field in node._fields:
+            value = getattr(node, field)
+            if isinstance(value, list):
+                setattr(node, field, [self.rewrite(child) for child in value])
+            elif value is not None:
+                setattr(node, field, self.rewrite(value))
+        return self.fuse(node)
+
+    def fuse(self, node):
+        # Returns the fused replacement for node, or node itself
+        if isinstance(node, Assign) and isinstance(node.expr, BinOp):
+            expr = node.expr
+            op_type = expr.op.type
+            if (op_type in ARITHMETIC and isinstance(expr.left, Var)
+                    and expr.left.name == node.name
+                    and not any(isinstance(child, Input) for child in walk(expr.right))):
+                if op_type in (PLUS, MINUS) and isinstance(expr.right, Num):
+                    fused = Increment(node.name, OPERATORS[op_type], expr.right.value)
+                    self.count('increment')
+                else:
+                    fused = Accumulate(node.name, OPERATORS[op_type], expr.right)
+                    self.count('accumulate')
+                fused.kills = node.kills
+                return copy_location(fused, node)
+
+        if isinstance(node, BinOp) and node.op.type in COMPARISONS and isinstance(node.left, Var):
+            if isinstance(node.right, Var):
+                self.count('compare variables')
+                fused = CompareVars(OPERATORS[node.op.type], node.left.name, node.right.name)
+            elif isinstance(node.right, Num):
+                self.count('compare with constant')
+                fused = CompareConst(OPERATORS[node.op.type], node.left.name, node.right.value)
+            else:
+                return node
+            fused.static_type = node.static_type
+            return copy_location(fused, node)
+
+        return node
+
+    def optimize(self, tree, report=None):
+        tree = self.rewrite(tree)
+        if report is not None and self.fused:
+            forms = ', '.join(f"{times} {form}" for form, times in self.fused.items())
+            report.append(f"peephole: fused {forms}")
+        return tree
+
+
+def fuse_idioms(tree, report=None):
+    # Rewrites common statement idioms of a parsed program into fused nodes
+    return PeepholeOptimizer().optimize(tree, report)
@@ -0,0 +1,88 @@
+# profiler.py
+import sys
+import threading
+import time
+from collections import Counter
+from ast_nodes import *
+
+
+class SamplingProfiler:
+    """Samples which lines of a script the interpreter is running.
+
+    A background thread wakes up every interval seconds and looks at the
+    interpreter thread's Python stack. Each visit method has the node it
+    is running in its 'node' local, so the stack gives the chain of
+    script nodes being run, from the program down to the current
+    expression. Every distinct source line on that chain becomes one
+    frame, named after the outermost node on the line, like
+    'flow.txt:4 while'. The interpreter is not changed at all, so there
+    is no cost when the profiler is off.
+
+    Samples are written in the collapsed stack format read by
+    flamegraph.pl and speedscope: one 'frame;frame;frame count' line per
+    distinct stack.
+    """
+
+    def __init__(self, filename='<script>', interval=0.005):
+        self.filename = filename
+        self.interval = interval
+        self.samples = Counter()
+        self.thread = None
+        self.target = None
+        self.running = threading.Event()
+
+    def start(self):
+        # Starts sampling the calling thread
+        self.target = threading.get_ident()
+        self.running.set()
+        self.thread = threading.Thread(target=self.sample_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running.clear()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def sample_loop(self):
+        while self.running.is_set():
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(self.target)
+            if frame is not None:
+                stack = self.script_stack(frame)
+                if stack:
+                    self.samples[stack] += 1
+
+    def script_stack(self, frame):
+        # Returns the script frames of a Python stack, outermost first
+        nodes = []
+        while frame is not None:
+            code = frame.f_code
+            if code.co_name.startswith('visit') and 'node' in code.co_varnames:
+                node = frame.f_locals.get('node')
+                if isinstance(node, AST) and not isinstance(node, Block) and node.line is not None:
+                    nodes.append(node)
+            frame = frame.f_back
+
+        stack = [self.filename]
+        last_line = None
+        for node in reversed(nodes):
+            if node.line != last_line:
+                stack.append(f"{self.filename}:{node.line} {type(node).__name__.lower()}")
+                last_line = node.line
+        return tuple(stack)
+
+    def collapsed(self):
+        # Returns the samples in collapsed stack format
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def write(self, path):
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
@@ -0,0 +1,175 @@
+# scheduler.py
+import io
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from interpreter import Interpreter
+from ast_nodes import *
+
+
+def read_write_sets(stmt):
+    # Returns the names of the variables a statement reads and writes
+    reads = set()
+    writes = set()
+    for node in walk(stmt):
+        if isinstance(node, Var):
+            reads.add(node.name)
+        elif isinstance(node, (Assign, Delete)):
+            writes.add(node.name)
+        elif isinstance(node, Input):
+            writes.add(node.var_name)
+        elif isinstance(node, (Increment, Accumulate)):
+            # Fused name = name <op> ...
+            reads.add(node.name)
+            writes.add(node.name)
+        elif isinstance(node, CompareVars):
+            reads.update((node.left, node.right))
+        elif isinstance(node, CompareConst):
+            reads.add(node.name)
+    return reads, writes
+
+
+def has_input(stmt):
+    # Input reads the terminal, so it has to run in this process
+    return any(isinstance(node, Input) for node in walk(stmt))
+
+
+def independent_groups(statements):
+    """Group statements that can run apart from each other.
+
+    Two statements depend on each other when one writes a variable the
+    other reads or writes; statements that only read the same variable
+    do not. Each group is a connected part of that dependency graph, as
+    a list of statement indexes in program order, and no statement in
+    one group touches a variable another group writes.
+    """
+    parent = list(range(len(statements)))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    touching = {}
+    written = set()
+    for index, stmt in enumerate(statements):
+        reads, writes = read_write_sets(stmt)
+        written |= writes
+        for name in reads | writes:
+            touching.setdefault(name, []).append(index)
+    for name in written:
+        first = find(touching[name][0])
+        for index in touching[name][1:]:
+            parent[find(index)] = first
+
+    groups = {}
+    for index in range(len(statements)):
+        groups.setdefault(find(index), []).append(index)
+    return sorted(groups.values())
+
+
+def run_group(statements, variables):
+    """Run one group of statements in a worker process.
+
+    Returns one (output, assigned, deleted, value) entry per statement
+    that ran, and the exception of the statement that failed, if any.
+    assigned and deleted describe the statement's writes, so the caller
+    can apply them in program order.
+    """
+    interpreter = Interpreter(variables)
+    results = []
+    for stmt in statements:
+        reads, writes = read_write_sets(stmt)
+        output = io.StringIO()
+        try:
+            with redirect_stdout(output):
+                value = interpreter.visit(stmt)
+        except Exception as error:
+            results.append((output.getvalue(), {}, (), None))
+            return results, error
+        assigned = {name: variables[name] for name in writes if name in variables}
+        deleted = tuple(name for name in writes if name not in variables)
+        results.append((output.getvalue(), assigned, deleted, value))
+    return results, None
+
+
+class Scheduler:
+    """Runs the independent top level statements of a program in parallel.
+
+    Statements are split into groups with independent_groups, and each
+    group runs in a process pool with only the variables it touches. The
+    results are then applied in program order: output is printed and
+    variables are updated statement by statement. The printed output and
+    the final variables are the same as running the program in order,
+    including when a statement fails. Statements that contain input run
+    in this process and split the program into separately scheduled
+    segments.
+    """
+
+    def __init__(self, interpreter, jobs=None):
+        self.interpreter = interpreter
+        self.jobs = jobs
+
+    def run(self, tree):
+        result = None
+        segment = []
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            for stmt in tree.statements:
+                if has_input(stmt):
+                    if segment:
+                        self.run_segment(pool, segment)
+                        segment = []
+                    result = self.interpreter.visit(stmt)
+                else:
+                    segment.append(stmt)
+            if segment:
+                result = self.run_segment(pool, segment)
+        return result
+
+    def run_segment(self, pool, statements):
+        # Runs statements without input, returning the last one's value
+        groups = independent_groups(statements)
+        if len(groups) < 2:
+            return self.interpreter.visit(Block(statements))
+
+        global_vars = self.interpreter.global_vars
+        futures = []
+        for group in groups:
+            group_statements = [statements[index] for index in group]
+            names = set()
+            for stmt in group_statements:
+                reads, writes = read_write_sets(stmt)
+                names |= reads | writes
+            variables = {name: global_vars[name] for name in names if name in global_vars}
+            futures.append(pool.submit(run_group, group_statements, variables))
+
+        # Collect every statement's result by its position in the program
+        results = {}
+        errors = {}
+        for group, future in zip(groups, futures):
+            group_results, error = future.result()
+            for index, entry in zip(group, group_results):
+                results[index] = entry
+            if error is not None:
+                errors[group[len(group_results) - 1]] = error
+
+        # Workers wrote variables behind the back of the memo temporaries
+        self.interpreter.temps.clear()
+        value = None
+        for index in range(len(statements)):
+            output, assigned, deleted, value = results[index]
+            sys.stdout.write(output)
+            global_vars.update(assigned)
+            for name in deleted:
+                if name in global_vars:
+                    del global_vars[name]
+            if index in errors:
+                # The worker's exception, so -j fails the same way as in order
+                raise errors[index]
+        return value
+
+
+def run_parallel(tree, interpreter, jobs=None):
+    # Runs a program's top level statements in parallel where they are independent
+    return Scheduler(interpreter, jobs).run(tree)
@@ -0,0 +1,166 @@
+# stats.py
+import json
+import sys
+import time
+import tracemalloc
+from lexer import Lexer, TokenListLexer
+from parser import Parser
+from interpreter import Interpreter
+from typecheck import check
+from optimizer import optimize
+from intern import POOL
+from ast_nodes import *
+
+
+class CountingInterpreter(Interpreter):
+    # Interpreter that counts how many statements it executes
+    def __init__(self, global_vars, statements):
+        super().__init__(global_vars)
+        # ids of the nodes that sit in statement position
+        self.statement_ids = statements
+        self.executed = 0
+
+    def visit(self, node):
+        if id(node) in self.statement_ids:
+            self.executed += 1
+        return Interpreter.visit(self, node)
+
+
+def statement_ids(tree):
+    # Returns the ids of the statements in a program: the entries of its
+    # blocks and the branches and bodies of its ifs and whiles
+    ids = set()
+    for node in walk(tree):
+        if isinstance(node, Block):
+            children = node.statements
+        elif isinstance(node, If):
+            children = (node.then_expr, node.else_expr)
+        elif isinstance(node, While):
+            children = (node.body,)
+        else:
+            continue
+        for child in children:
+            if child is not None and not isinstance(child, Block):
+                ids.add(id(child))
+    return ids
+
+
+class PhaseTimer:
+    """Measures each phase of a run.
+
+    For every phase it records wall time, CPU time, the peak memory
+    traced by tracemalloc above what was in use when the phase started,
+    and the net change in live memory blocks: how many more blocks were
+    allocated than freed, not how many allocations the phase made.
+    tracemalloc slows everything it traces, so the times are comparable
+    between phases rather than with a run without --stats.
+    """
+
+    def __init__(self):
+        self.phases = []
+
+    def measure(self, name, function, *args):
+        # Runs function(*args) as one phase and returns its result
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        blocks_before = sys.getallocatedblocks()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            wall = time.perf_counter() - wall_before
+            cpu = time.process_time() - cpu_before
+            blocks = sys.getallocatedblocks() - blocks_before
+            peak = tracemalloc.get_traced_memory()[1] - memory_before
+            self.phases.append({
+                'phase': name,
+                'wall_seconds': wall,
+                'cpu_seconds': cpu,
+                'peak_memory_bytes': peak,
+                'net_live_blocks': blocks,
+            })
+
+
+def read_file(file_path):
+    with open(file_path, 'r') as f:
+        return f.read()
+
+
+def run_with_stats(file_path, global_vars, stats, optimise=False, report=None):
+    """Run a program file, measuring each phase separately.
+
+    Fills the stats dictionary in place and returns the program's result.
+    If the program fails, the phases measured so far stay in stats, the
+    error is stored under 'error' and the exception is re-raised.
+    """
+    timer = PhaseTimer()
+    stats['file'] = file_path
+    stats['phases'] = timer.phases
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        text = timer.measure('read', read_file, file_path)
+        tokens = timer.measure('tokenise', Lexer(text).tokenize)
+        stats['tokens'] = len(tokens) - 1
+        parser = Parser(text, TokenListLexer(tokens))
+        tree = timer.measure('parse', parser.program)
+        # Every token the parser saw was pulled through the stream once
+        stats['token_stream'] = parser.tokens.statistics()
+        stats['ast_nodes'] = sum(1 for node in walk(tree))
+        # Shared with every program lexed before this one
+        stats['intern_pool'] = POOL.statistics()
+        timer.measure('typecheck', check, tree, global_vars)
+        if optimise:
+            tree = timer.measure('optimise', optimize, tree, report)
+            stats['optimised_ast_nodes'] = sum(1 for node in walk(tree))
+        interpreter = CountingInterpreter(global_vars, statement_ids(tree))
+        try:
+            result = timer.measure('execute', interpreter.visit, tree)
+        finally:
+            stats['statements_executed'] = interpreter.executed
+    except Exception as error:
+        stats['error'] = str(error)
+        raise
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return result
+
+
+def format_stats(stats, output_format='text'):
+    # Formats statistics as a table, or as JSON
+    if output_format == 'json':
+        return json.dumps(stats, indent=2)
+    lines = [f"{'phase':<10} {'wall ms':>10} {'cpu ms':>10} {'peak KiB':>10} {'net blocks':>10}"]
+    for phase in stats['phases']:
+        lines.append(
+            f"{phase['phase']:<10} {phase['wall_seconds'] * 1000:>10.2f} "
+            f"{phase['cpu_seconds'] * 1000:>10.2f} {phase['peak_memory_bytes'] / 1024:>10.1f} "
+            f"{phase['net_live_blocks']:>10}"
+        )
+    counts = [
+        ('tokens', 'tokens'),
+        ('ast nodes', 'ast_nodes'),
+        ('ast nodes after optimising', 'optimised_ast_nodes'),
+        ('statements executed', 'statements_executed'),
+    ]
+    for label, key in counts:
+        if key in stats:
+            lines.append(f"{label}: {stats[key]}")
+    if 'token_stream' in stats:
+        stream = stats['token_stream']
+        lines.append(
+            f"token stream: {stream['tokens_lexed']} pulled, {stream['tokens_consumed']} consumed, "
+            f"lookahead up to {stream['max_lookahead']}, {stream['resets']} resets"
+        )
+    if 'intern_pool' in stats:
+        pool = stats['intern_pool']
+        lines.append(
+            f"intern pool: {pool['size']} of {pool['limit']} values, {pool['hits']} hits, "
+            f"{pool['misses']} misses, {pool['rejected']} rejected"
+        )
+    if 'error' in stats:
+        lines.append(f"error: {stats['error']}")
+    return '\n'.join(lines)
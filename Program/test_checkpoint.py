@@ -0,0 +1,92 @@
+# test_checkpoint.py
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from checkpoint import Checkpointer, source_key
+from interpreter import Interpreter
+from optimizer import optimize
+from parser import Parser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Single statement loop and branch bodies, and both branches of an if
+BODIES = """i = 0
+while (i < 3) i = i + 1
+if (i == 3) then print(i) else print(0)
+if (i == 4) then print(1) else print(i * 2)
+j = 0
+while (j < 2) {
+  k = 0
+  while (k < 2) k = k + 1
+  if (j == 0) then { print(k) } else { print(j) }
+  j = j + 1
+}
+print(j + k)
+"""
+
+
+class Crash(BaseException):
+    # Stops a run right after a checkpoint was saved
+    pass
+
+
+def run(text, optimise, path, crash_at=0, resume=False):
+    """Run text saving a checkpoint before every statement.
+
+    With crash_at, the run stops right after that many checkpoints were
+    saved, and the output printed before the last one is returned.
+    Returns the output, the result, the variables and whether it crashed.
+    """
+    interpreter = Interpreter({})
+    tree = Parser(text).program()
+    if optimise:
+        tree = optimize(tree)
+    checkpointer = Checkpointer(interpreter, path, source_key(text, optimise), 1, 1e9, resume)
+    output = io.StringIO()
+    saved = []
+    save = checkpointer.save
+
+    def crashing_save(statement_path):
+        save(statement_path)
+        saved.append(output.tell())
+        if len(saved) == crash_at:
+            raise Crash()
+
+    if crash_at:
+        checkpointer.save = crashing_save
+    try:
+        with redirect_stdout(output):
+            result = checkpointer.run(tree)
+    except Crash:
+        return output.getvalue()[:saved[-1]], None, dict(interpreter.global_vars), True
+    return output.getvalue(), result, dict(interpreter.global_vars), False
+
+
+def check_every_crash_point(text, tmp_path):
+    path = str(tmp_path / 'state.ck')
+    for optimise in (False, True):
+        output, result, variables, crashed = run(text, optimise, path)
+        assert not crashed and not os.path.exists(path)
+        crash_at = 1
+        while True:
+            before, _, _, crashed = run(text, optimise, path, crash_at)
+            if not crashed:
+                break
+            after, resumed, resumed_variables, _ = run(text, optimise, path, resume=True)
+            assert before + after == output, (optimise, crash_at)
+            assert (resumed, resumed_variables) == (result, variables), (optimise, crash_at)
+            assert not os.path.exists(path)
+            crash_at += 1
+        assert crash_at > 10
+
+
+def test_resume_flow_from_every_statement(tmp_path):
+    with open(os.path.join(HERE, 'flow.txt')) as f:
+        check_every_crash_point(f.read(), tmp_path)
+
+
+def test_resume_into_single_statement_bodies(tmp_path):
+    check_every_crash_point(BODIES, tmp_path)
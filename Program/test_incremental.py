@@ -0,0 +1,78 @@
+# test_incremental.py
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from incremental import IncrementalSession
+from parser import Parser
+from interpreter import Interpreter
+
+
+def test_repeated_chunks_keep_distinct_lines():
+    session = IncrementalSession()
+    tree = session.program("i = 1\nj = 2\ni = 1\n")
+    assert [stmt.line for stmt in tree.statements] == [1, 2, 3]
+    assert tree.statements[0] is not tree.statements[2]
+
+    # Reparsing after an edit moves the cached chunks without mixing them up
+    tree = session.program("k = 0\ni = 1\nj = 2\ni = 1\ni = 1\n")
+    assert [stmt.line for stmt in tree.statements] == [1, 2, 3, 4, 5]
+    assert len({id(stmt) for stmt in tree.statements}) == 5
+
+
+def test_early_syntax_error_is_not_joined_with_the_rest():
+    text = "x = (\n" + "".join(f"v{i} = {i}\n" for i in range(2000))
+    try:
+        Parser(text).program()
+    except Exception as error:
+        expected = str(error)
+    session = IncrementalSession()
+    try:
+        session.program(text)
+    except Exception as error:
+        assert str(error) == expected
+    else:
+        assert False, "expected a syntax error"
+    assert len(session.incomplete) <= 1
+
+
+def test_statement_completed_by_later_chunks():
+    tree = IncrementalSession().program("a = 1\nb = (\n2\n)\nc = b\n")
+    assert [stmt.line for stmt in tree.statements] == [1, 2, 5]
+
+
+def run_plain(text):
+    global_vars = {}
+    result = Interpreter(global_vars).visit(Parser(text).program())
+    return result, global_vars
+
+
+def test_resume_after_edit_in_a_large_script():
+    lines = [f"v{i} = {i}" for i in range(200)]
+    lines += [f"v{i % 200} = v{(i + 1) % 200} + 1" for i in range(4000)]
+    session = IncrementalSession()
+    session.run('\n'.join(lines) + '\n')
+
+    lines[-10] = "v5 = 12345"
+    lines[-3] = "v7 = v5 * 2"
+    text = '\n'.join(lines) + '\n'
+    result = session.run(text)
+    assert (result, session.interpreter.global_vars) == run_plain(text)
+
+    # The undo log holds one value per variable each chunk writes, not a
+    # copy of every variable per chunk
+    assert sum(len(entry) for entry in session.undo) == len(lines)
+
+    # Without resume the script runs again from the very first variables
+    assert session.run(text, resume=False) == result
+    assert session.interpreter.global_vars == run_plain(text)[1]
+
+
+def test_failed_chunk_is_rewound():
+    session = IncrementalSession()
+    try:
+        session.run("a = 1\nb = a\ndel_me = 3\nc = missing\n")
+    except Exception:
+        pass
+    assert session.run("a = 1\nb = a\nc = 2\n") == 2
+    assert session.interpreter.global_vars == {'a': 1, 'b': 1, 'c': 2}
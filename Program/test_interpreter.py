@@ -0,0 +1,27 @@
+# test_interpreter.py
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ast_nodes import And, BinOp, Bool, Num, Or, Var
+from interpreter import Interpreter
+from tokens import Token, DIV
+
+
+def test_or_skips_the_right_operand_when_left_is_true():
+    assert Interpreter({}).visit(Or(Bool(True), Var('missing'))) is True
+
+
+def test_and_skips_the_right_operand_when_left_is_false():
+    divide = BinOp(Num(1), Token(DIV, '/'), Num(0))
+    assert Interpreter({}).visit(And(Bool(False), divide)) is False
+
+
+def test_right_operand_still_runs_when_needed():
+    divide = BinOp(Num(1), Token(DIV, '/'), Num(0))
+    try:
+        Interpreter({}).visit(And(Bool(True), divide))
+    except ZeroDivisionError:
+        pass
+    else:
+        assert False, "1 / 0 was not evaluated"
@@ -0,0 +1,22 @@
+# test_lexer.py
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lexer import Lexer
+
+
+def test_reset_restores_the_line_and_column():
+    text = "a = 1\nb = 2\n  c = 3"
+    lexer = Lexer(text, line=10)
+    while lexer.get_next_token().value != 'c':
+        pass
+    lexer.reset(text.index('b'))
+    token = lexer.get_next_token()
+    assert (token.value, token.line, token.column) == ('b', 11, 1)
+    lexer.reset(0)
+    token = lexer.get_next_token()
+    assert (token.value, token.line, token.column) == ('a', 10, 1)
+    lexer.reset(text.index('c'))
+    token = lexer.get_next_token()
+    assert (token.value, token.line, token.column) == ('c', 12, 3)
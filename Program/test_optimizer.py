@@ -0,0 +1,79 @@
+# test_optimizer.py
+import io
+import os
+import sys
+from contextlib import redirect_stdout
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from interpreter import Interpreter
+from optimizer import optimize
+from parser import Parser
+from typecheck import check
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES = ['arithmetic.txt', 'boolean.txt', 'flow.txt', 'global.txt', 'logic.txt', 'text.txt']
+
+CASES = [
+    # Dead store ahead of an overwrite that fails
+    "c = (true < true)\nc = b\n",
+    "a = 1\na = 2\nprint(a)\n",
+    "if (1 < 2) then x = 1 else x = 2\nwhile (false) x = 3\nprint(x)\n",
+    # Shared subexpressions invalidated by a fused increment
+    "x = 1\ny = x * 2 + x * 2\nx = x + 1\nz = x * 2 + x * 2\nprint(y + z)\n",
+    "i = 0\ns = 0\nwhile (i < 5) {\n  s = s + i * i\n  i = i + 1\n}\nprint(s)\n",
+    "n = 3\nm = n * n\ndel_n = n\nn = DEL\nprint(m)\nprint(n)\n",
+    "a = 2\nb = a == 2\nc = a != 3\nprint(b and c)\n",
+]
+
+
+def run(text, optimise, report=None):
+    # Returns the printed output, the result or error, and the variables
+    global_vars = {}
+    output = io.StringIO()
+    with redirect_stdout(output):
+        try:
+            tree = Parser(text).program()
+            check(tree, global_vars)
+            if optimise:
+                tree = optimize(tree, report)
+            outcome = ('result', Interpreter(global_vars).visit(tree))
+        except Exception as error:
+            outcome = ('error', str(error))
+    return output.getvalue(), outcome, global_vars
+
+
+def assert_same(text):
+    plain = run(text, False)
+    optimised = run(text, True)
+    assert optimised[:2] == plain[:2], text
+    return plain, optimised
+
+
+def test_examples():
+    for name in EXAMPLES:
+        with open(os.path.join(HERE, name)) as f:
+            plain, optimised = assert_same(f.read())
+        assert optimised[2] == plain[2], name
+
+
+def test_cases():
+    for text in CASES:
+        assert_same(text)
+
+
+def test_dead_store_before_failing_overwrite():
+    plain, optimised = assert_same(CASES[0])
+    assert plain[1] == ('error', "Undefined variable 'b'")
+    # The dropped store leaves c unset when the overwrite fails
+    assert plain[2] == {'c': False}
+    assert optimised[2] == {}
+
+
+def test_increment_invalidates_shared_subexpressions():
+    report = []
+    output, outcome, variables = run(CASES[3], True, report)
+    # z is worked out from the incremented x, not the x * 2 of line 2
+    assert (output, outcome) == ("12\n", ('result', None))
+    assert variables == {'x': 2, 'y': 4, 'z': 8}
+    assert any(line.startswith('cse:') for line in report)
+    assert any(line.startswith('peephole:') and 'increment' in line for line in report)
@@ -0,0 +1,53 @@
+# test_tokenstream.py
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from lexer import Lexer, TokenListLexer
+from tokens import Token, IDENTIFIER, EOF
+from tokenstream import TokenStream
+
+
+def names(count):
+    return TokenListLexer([Token(IDENTIFIER, f"a{i}") for i in range(count)] + [Token(EOF, None)])
+
+
+def test_reset_before_a_later_mark_keeps_the_current_token():
+    stream = TokenStream(names(10), capacity=4)
+    first = stream.mark()
+    stream.advance()
+    stream.mark()
+    stream.reset(first)
+    # Lexing far ahead grows the buffer, which must keep the current token
+    assert stream.peek(6).value == 'a6'
+    assert stream.peek(0).value == 'a0'
+
+
+def test_nested_marks():
+    stream = TokenStream(names(10), capacity=2)
+    outer = stream.mark()
+    stream.advance()
+    inner = stream.mark()
+    stream.advance()
+    stream.advance()
+    stream.reset(inner)
+    assert stream.peek().value == 'a1'
+    stream.reset(outer)
+    assert [stream.peek(k).value for k in range(5)] == ['a0', 'a1', 'a2', 'a3', 'a4']
+    assert stream.statistics()['tokens_lexed'] == 5
+
+
+def test_end_of_input_repeats():
+    stream = TokenStream(Lexer("x"))
+    assert stream.peek().value == 'x'
+    assert stream.peek(1).type == EOF
+    assert stream.peek(3).type == EOF
+    assert stream.statistics()['tokens_lexed'] == 2
+
+
+def test_capacity_rounds_up_to_a_power_of_two():
+    stream = TokenStream(Lexer("a b c d e f g h"), capacity=6)
+    assert len(stream.buffer) == 8
+    assert stream.peek(2).value == 'c'
+    assert stream.peek(0).value == 'a'
+    assert [stream.peek(k).value for k in range(8)] == list('abcdefgh')
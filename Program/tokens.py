@@ -15,10 +15,13 @@ IF, THEN, ELSE, WHILE, INPUT = 'IF', 'THEN', 'ELSE', 'WHILE', 'INPUT'
 LBRACE, RBRACE = 'LBRACE', 'RBRACE'
 
 class Token(object):
-    def __init__(self, type, value):
+    def __init__(self, type, value, line=None, column=None):
         # Initialize a token with type and optional value
         self.type = type
         self.value = value
+        # Source position of the token's first character, counted from 1
+        self.line = line
+        self.column = column
 
     def __str__(self):
         # Return a string of token for debugging
@@ -0,0 +1,114 @@
+# tokenstream.py
+from tokens import EOF
+
+
+class TokenStream(object):
+    """Buffered tokens over a lexer, with k token lookahead and backtracking.
+
+    Tokens are kept in a ring buffer indexed by their absolute position
+    in the stream. peek(k) lexes ahead only as far as needed, and a token
+    stays in the buffer until it is consumed and no mark still needs it,
+    so mark() and reset() rewind without lexing anything again. The
+    buffer doubles when lookahead or marks need more room.
+
+    Positions are mapped into the buffer with a mask, so its size is
+    always a power of two; a capacity that is not is rounded up.
+    """
+
+    def __init__(self, lexer, capacity=8):
+        self.lexer = lexer
+        capacity = 1 << max(capacity - 1, 0).bit_length()
+        self.buffer = [None] * capacity
+        self.mask = capacity - 1
+        # Absolute positions: oldest kept token, current token, next to lex
+        self.start = 0
+        self.pos = 0
+        self.end = 0
+        # Positions of the marks not yet reset or released
+        self.marks = []
+        # Statistics
+        self.lexed = 0
+        self.consumed = 0
+        self.resets = 0
+        self.max_lookahead = 0
+        self.chars_lexed = 0
+
+    def grow(self):
+        # Doubles the buffer, keeping every token from start to end
+        old, old_mask = self.buffer, self.mask
+        self.buffer = [None] * (len(old) * 2)
+        self.mask = len(self.buffer) - 1
+        for index in range(self.start, self.end):
+            self.buffer[index & self.mask] = old[index & old_mask]
+
+    def fill(self, index):
+        # Lexes tokens until the one at absolute position index is buffered
+        while self.end <= index:
+            if self.end - self.start == len(self.buffer):
+                self.grow()
+            last = self.buffer[(self.end - 1) & self.mask] if self.end else None
+            if last is not None and last.type == EOF:
+                # Past the end of input the end token repeats, unlexed
+                token = last
+            else:
+                before = getattr(self.lexer, 'pos', 0)
+                token = self.lexer.get_next_token()
+                self.chars_lexed += getattr(self.lexer, 'pos', 0) - before
+                self.lexed += 1
+            self.buffer[self.end & self.mask] = token
+            self.end += 1
+
+    def peek(self, k=0):
+        # Returns the token k places after the current one
+        index = self.pos + k
+        if index >= self.end:
+            self.fill(index)
+            if k > self.max_lookahead:
+                self.max_lookahead = k
+        return self.buffer[index & self.mask]
+
+    def advance(self):
+        # Consumes the current token
+        if self.pos >= self.end:
+            self.fill(self.pos)
+        self.pos += 1
+        self.consumed += 1
+        if not self.marks:
+            self.start = self.pos
+
+    def mark(self):
+        # Remembers the current position so reset() can return to it
+        self.marks.append(self.pos)
+        return self.pos
+
+    def reset(self, mark):
+        # Rewinds to a mark, which is released
+        self.pos = mark
+        self.resets += 1
+        self.release(mark)
+
+    def release(self, mark):
+        # Forgets a mark, letting the tokens before it be dropped
+        self.marks.remove(mark)
+        # After a reset the current position can be before the other marks
+        self.start = min(self.marks + [self.pos])
+
+    def lexed_to_end(self):
+        # Whether the lexer has reached the end of input
+        return self.end > 0 and self.buffer[(self.end - 1) & self.mask].type == EOF
+
+    def clear(self):
+        # Drops every buffered token, for a lexer given a new input
+        self.start = self.pos = self.end = 0
+        self.marks = []
+
+    def statistics(self):
+        # Counts showing how much lexing the stream did
+        return {
+            'tokens_lexed': self.lexed,
+            'tokens_consumed': self.consumed,
+            'resets': self.resets,
+            'max_lookahead': self.max_lookahead,
+            'chars_lexed': self.chars_lexed,
+            'buffer_capacity': len(self.buffer),
+        }
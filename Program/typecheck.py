@@ -0,0 +1,222 @@
+# typecheck.py
+import operator
+from tokens import *
+from ast_nodes import *
+
+# Python operators behind each binary operator token
+OPERATORS = {
+    PLUS: operator.add,
+    MINUS: operator.sub,
+    MUL: operator.mul,
+    DIV: operator.truediv,
+    EQ: operator.eq,
+    NEQ: operator.ne,
+    LT: operator.lt,
+    GT: operator.gt,
+    LE: operator.le,
+    GE: operator.ge,
+}
+
+# Words used in type error messages
+VERBS = {
+    PLUS: 'add',
+    MINUS: 'subtract',
+    MUL: 'multiply',
+    DIV: 'divide',
+    LT: 'compare',
+    GT: 'compare',
+    LE: 'compare',
+    GE: 'compare',
+}
+
+# One value of each type the language has. Applying an operator to these
+# gives the result type, or a TypeError if no values of those types work
+SAMPLES = {int: 1, float: 1.0, str: 'a', bool: True}
+
+
+def result_type(function, *types):
+    # Returns the type produced by function on the given operand types,
+    # or None if Python rejects them
+    try:
+        return type(function(*(SAMPLES[t] for t in types)))
+    except TypeError:
+        return None
+
+
+def merge(first, second):
+    # Keeps the variables whose type is the same along both paths
+    return {name: t for name, t in first.items() if second.get(name) is t}
+
+
+class TypeChecker:
+    """Flow sensitive type inference over the AST.
+
+    Each expression node gets a static_type when the type of its value is
+    known before running. A BinOp whose operand types are both known also
+    gets impl, the Python operator for it, which the interpreter calls
+    directly. Type errors that happen whenever the program runs are
+    collected in errors; ones that depend on a branch or loop being taken
+    are collected in warnings.
+    """
+
+    def __init__(self, global_vars=None):
+        # Variable types known at the current point of the program
+        self.env = {}
+        for name, value in (global_vars or {}).items():
+            if type(value) in SAMPLES:
+                self.env[name] = type(value)
+        self.errors = []
+        self.warnings = []
+        self.reported = set()
+        # Greater than zero inside branches and loop bodies
+        self.conditional = 0
+        # Turned off while a loop body is iterated to a fixed point
+        self.recording = True
+
+    def visit(self, node):
+        # Dispatch method to call appropriate method
+        method_name = f"visit_{type(node).__name__}"
+        method = getattr(self, method_name, self.generic_visit)
+        return method(node)
+
+    def generic_visit(self, node):
+        # Nodes with no rules have an unknown type
+        return None
+
+    def report(self, node, message):
+        # Records a type error, once per node
+        if not self.recording:
+            return
+        if id(node) in self.reported:
+            return
+        self.reported.add(id(node))
+        found = self.errors if self.conditional == 0 else self.warnings
+        found.append((node, message))
+
+    def visit_Num(self, node):
+        node.static_type = type(node.value)
+        return node.static_type
+
+    def visit_Bool(self, node):
+        node.static_type = bool
+        return bool
+
+    def visit_Str(self, node):
+        node.static_type = str
+        return str
+
+    def visit_Var(self, node):
+        node.static_type = self.env.get(node.name)
+        return node.static_type
+
+    def visit_BinOp(self, node):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        op_type = node.op.type
+        node.static_type = None
+        node.impl = None
+        if left is None or right is None:
+            return None
+        node.static_type = result_type(OPERATORS[op_type], left, right)
+        if node.static_type is None:
+            self.report(node, f"Type error: cannot {VERBS[op_type]} {left.__name__} and {right.__name__}")
+        else:
+            node.impl = OPERATORS[op_type]
+        return node.static_type
+
+    def visit_And(self, node):
+        left = self.visit(node.left)
+        # The right side only runs for some values of the left
+        saved = self.env
+        self.env = dict(saved)
+        self.conditional += 1
+        right = self.visit(node.right)
+        self.conditional -= 1
+        self.env = merge(saved, self.env)
+        # The value is one of the operands
+        node.static_type = left if left is right else None
+        return node.static_type
+
+    visit_Or = visit_And
+
+    def visit_UnaryOp(self, node):
+        val = self.visit(node.expr)
+        node.static_type = None
+        if node.op.type == NOT:
+            node.static_type = bool
+        elif val is not None:
+            node.static_type = result_type(operator.neg, val)
+            if node.static_type is None:
+                self.report(node, f"Type error: cannot negate {val.__name__}")
+        return node.static_type
+
+    def visit_Assign(self, node):
+        self.env[node.name] = self.visit(node.expr)
+        return self.env[node.name]
+
+    def visit_Delete(self, node):
+        self.env.pop(node.name, None)
+        return None
+
+    def visit_Print(self, node):
+        self.visit(node.expr)
+        return None
+
+    def visit_Input(self, node):
+        # Input always stores a string
+        self.env[node.var_name] = str
+        node.static_type = str
+        return str
+
+    def branch(self, node):
+        # Checks a branch that may not run, returning the variable types after it
+        saved = self.env
+        self.env = dict(saved)
+        self.conditional += 1
+        if node is not None:
+            self.visit(node)
+        self.conditional -= 1
+        after, self.env = self.env, saved
+        return after
+
+    def visit_If(self, node):
+        self.visit(node.cond)
+        self.env = merge(self.branch(node.then_expr), self.branch(node.else_expr))
+        return None
+
+    def visit_While(self, node):
+        # The condition always runs at least once with the entry types
+        self.visit(node.cond)
+
+        # Widen the variable types until one more pass of the loop
+        # leaves them unchanged, without reporting anything on the way
+        recording, self.recording = self.recording, False
+        while True:
+            self.visit(node.cond)
+            widened = merge(self.env, self.branch(node.body))
+            if widened == self.env:
+                break
+            self.env = widened
+        self.recording = recording
+
+        # Check once more with the final types, so the annotations hold
+        # on every iteration
+        self.conditional += 1
+        self.visit(node.cond)
+        self.branch(node.body)
+        self.conditional -= 1
+        return None
+
+    def visit_Block(self, node):
+        for stmt in node.statements:
+            self.visit(stmt)
+        return None
+
+
+def check(node, global_vars=None):
+    # Type checks a program, raising the first error that would always happen
+    checker = TypeChecker(global_vars)
+    checker.visit(node)
+    if checker.errors:
+        raise Exception(checker.errors[0][1])
+    return checker
@@ -0,0 +1,55 @@
+# test_calculator.py
+import importlib.util
+import os
+
+# Program.py shares its name with the Program/ package, so load it by path
+spec = importlib.util.spec_from_file_location(
+    'calculator', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'Program.py'))
+calculator = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(calculator)
+
+NUMERIC_LINES = [
+    '1 2', '1 2.3.4', '1 .', '(1 2)', '-(3+2)*4', '4/0', '1.', '.5', '+1',
+    '1 - 2', '2.5 + 2.5 - 1.25', '(10 * 2) / 6', '8.5 / (2 * 9) - -3',
+    '(1)(2)', '007 + 1', '1/0.0', ')1', '(1', '1 +', '- -3', '2 * (3 + 4) / 7 - 1',
+]
+
+
+def slow(line):
+    # Returns ('value', value) or ('error', exception) from the Interpreter
+    try:
+        return 'value', calculator.Interpreter(line, {}).statement()
+    except Exception as error:
+        return 'error', error
+
+
+def test_fast_path_matches_interpreter():
+    evaluator = calculator.NumericEvaluator()
+    for line in NUMERIC_LINES:
+        kind, expected = slow(line)
+        value = evaluator.value(line)
+        if kind == 'error':
+            assert value is None, line
+        else:
+            assert value is not None, line
+            assert (value, type(value)) == (expected, type(expected)), line
+
+
+def test_cached_values_stay_the_same():
+    evaluator = calculator.NumericEvaluator(limit=2)
+    for _ in range(3):
+        for line in ('1 + 1', '2.5 * 2', '(3)', '7 / 2'):
+            assert evaluator.value(line) == slow(line)[1]
+    assert len(evaluator.cache) == 2
+    assert evaluator.hits == 0
+
+
+def test_lines_with_names_use_the_interpreter():
+    evaluator = calculator.NumericEvaluator()
+    assert evaluator.value('x + 1') is None
+    assert evaluator.value('print 1') is None
+
+
+def test_and_skips_the_right_operand_in_program():
+    assert calculator.Interpreter('x != 0 and 10 / x > 1', {'x': 0}).statement() is False
+    assert calculator.Interpreter('x < 1 or 10 / x > 1', {'x': 0}).statement() is True